@@ -1,17 +1,31 @@
 from time import sleep
+from contextlib import nullcontext
+from functools import partial
 import streamlit as st
 import pandas as pd
 import logging
 from sqlalchemy import text
-from logger_config import setup_logger
+from logger_config import setup_logger, set_log_context, novo_id, log_duration
 from database import (
-    create_table, fetch_all,
+    garantir_schema, SessaoLeitura, set_sessao_leitura, clausula_ano_letivo,
+    set_envoltorio_tarefa,
+    fetch_all,
     insert_record, delete_record,
-    create_professores_table, inserir_professor, listar_professores,
-    get_session, cadastrar_novo_usuario,insert_bloco
+    inserir_professor, listar_professores,
+    listar_turmas, listar_materias,
+    get_session, cadastrar_novo_usuario,insert_bloco,
+    buscar_registros, insert_records,
+    arquivar_periodo,
+    listar_alertas, contar_registros,
+    carregar_pagina
+)
+from services import (
+    validar_importacao, atualizar_em_massa,
+    STATUS_VALIDOS, ESQUEMA_IMPORTACAO, CAMPOS_EDICAO_EM_MASSA
 )
-from services import validar_colunas_excel
 from loggin import render_login
+from scheduler import AgendadorAlertas
+from profiler import perfil_rerun, perfil_tarefa, MODOS as MODOS_PERFIL
 
 # ================= Login gate =================
 if "logged" not in st.session_state:
@@ -25,12 +39,34 @@ if not st.session_state.logged:
 setup_logger()
 LOGGER = logging.getLogger("app")
 
+if "request_id" not in st.session_state:
+    st.session_state.request_id = novo_id()
+rerun_id = novo_id()
+set_log_context(request_id=st.session_state.request_id, rerun_id=rerun_id)
+
+# Read-your-writes por sessão: só as escritas desta sessão a prendem ao primário
+if "sessao_leitura" not in st.session_state:
+    st.session_state.sessao_leitura = SessaoLeitura()
+set_sessao_leitura(st.session_state.sessao_leitura)
+
 st.set_page_config(page_title="Controle de Matéria", layout="wide")
 
-if "db_initialized" not in st.session_state:
-    create_table()
-    create_professores_table()
-    st.session_state.db_initialized = True
+@st.cache_resource
+def preparar_banco():
+    # Uma vez por processo; o DDL só roda se a versão do schema mudou
+    garantir_schema()
+
+preparar_banco()
+
+
+@st.cache_resource
+def iniciar_agendador() -> AgendadorAlertas:
+    # Um agendador por processo, compartilhado entre as sessões
+    agendador = AgendadorAlertas()
+    agendador.iniciar()
+    return agendador
+
+agendador = iniciar_agendador()
 
 st.title("📚 EduManager – Controle e Gerenciamento de Matéria Escolar")
 
@@ -41,6 +77,24 @@ dias_alerta = st.sidebar.slider(
     1, 30, 7
 )
 
+incluir_historico = st.sidebar.checkbox(
+    "Incluir períodos arquivados",
+    help="Carrega também os anos letivos já arquivados (mais lento)"
+)
+
+modo_perfil = None
+if st.session_state.status in ["super_admin", "admin"]:
+    st.sidebar.divider()
+    st.sidebar.subheader("⏱️ Profiling")
+    modo_perfil = st.sidebar.selectbox(
+        "Perfilar este rerun",
+        [None, *MODOS_PERFIL],
+        format_func=lambda m: "Desligado" if m is None else m.capitalize(),
+        help="Grava perfil de CPU e pico de memória do rerun em disco"
+    )
+    if modo_perfil:
+        st.sidebar.caption(f"Rerun `{rerun_id}`")
+
 st.sidebar.divider()
 st.sidebar.subheader("📖 App Version")
 st.sidebar.info(
@@ -49,393 +103,584 @@ st.sidebar.info(
     """
 )
 
-# ================= Tabs =================
+# ================= Busca =================
+BUSCA_POR_PAGINA = 50
 
-if st.session_state.status in ["super_admin", "admin"]:
-    tabs = st.tabs(["📊 Visualização", "✍️ Cadastro", "👤 Cadastro de Usuario", "📖 Sobre"])
+def render_busca():
+    st.subheader("🔍 Buscar")
 
+    col_termo, col_pagina = st.columns([4, 1])
+    termo = col_termo.text_input(
+        "Matéria, capítulo, professor ou observação",
+        key="busca_termo"
+    )
+    pagina = col_pagina.number_input("Página", min_value=1, value=1, key="busca_pagina")
 
-    # ================= Visualização =================
-    with tabs[0]:
-        df = fetch_all()
+    if not termo.strip():
+        return
 
-        professores_df = listar_professores()
-        professores = professores_df["nome"].tolist() if not professores_df.empty else []
+    with log_duration(LOGGER, "buscar_registros"):
+        resultados, total = buscar_registros(termo, pagina, BUSCA_POR_PAGINA)
 
-        st.subheader("🔎 Filtros")
+    paginas = max(1, -(-total // BUSCA_POR_PAGINA))
+    st.caption(f"{total} resultado(s) — página {pagina} de {paginas}")
 
-        col1, col2, col3, col4 = st.columns(4)
+    if pagina > paginas:
+        st.warning(f"A busca tem só {paginas} página(s).")
 
-        filtro_turma = col1.selectbox(
-            "Turma",
-            ["Todos"] + sorted(df["turma"].dropna().unique().tolist())
+    if not resultados.empty:
+        st.dataframe(
+            resultados.drop(columns="relevancia"),
+            use_container_width=True,
+            hide_index=True
         )
 
-        filtro_prof = col2.selectbox(
-            "Professor",
-            ["Todos"] + sorted(df["professor_titular"].dropna().unique().tolist())
-        )
+# ================= Tabs =================
+perfil = perfil_rerun(rerun_id, modo_perfil) if modo_perfil else nullcontext()
+# Consultas paralelas do carregar_pagina entram no perfil do rerun
+set_envoltorio_tarefa(perfil_tarefa if modo_perfil else None)
 
-        filtro_materia = col3.selectbox(
-            "Matéria",
-            ["Todos"] + sorted(df["materia"].dropna().unique().tolist())
-        )
+with perfil:
 
-        filtro_capitulo = col4.selectbox(
-            "Capítulo",
-            ["Todos"] + sorted(df["capitulo"].dropna().unique().tolist())
-        )
+    if st.session_state.status in ["super_admin", "admin"]:
+        tabs = st.tabs(["📊 Visualização", "✍️ Cadastro", "👤 Cadastro de Usuario", "📖 Sobre"])
 
-        filtro_dias = st.number_input(
-            "Mostrar matérias com prazo em até (dias)",
-            min_value=0,
-            value=0,
-            help="0 = mostrar todas"
-        )
 
-        hoje = pd.Timestamp.today().normalize()
-        df_filtrado = df.copy()
+        # ================= Visualização =================
+        with tabs[0]:
+            with log_duration(LOGGER, "carregar_visualizacao"):
+                dados = carregar_pagina(
+                    registros=partial(fetch_all, incluir_historico=incluir_historico),
+                    professores=listar_professores,
+                    turmas=listar_turmas,
+                    materias=listar_materias,
+                    alertas=partial(listar_alertas, dias_alerta),
+                )
 
-        if filtro_turma != "Todos":
-            df_filtrado = df_filtrado[df_filtrado["turma"] == filtro_turma]
+            df = dados["registros"]
+            professores_df = dados["professores"]
+            turmas_df = dados["turmas"]
+            materias_df = dados["materias"]
+            alertas_df = dados["alertas"]
 
-        if filtro_prof != "Todos":
-            df_filtrado = df_filtrado[df_filtrado["professor_titular"] == filtro_prof]
+            professores = professores_df["nome"].tolist() if not professores_df.empty else []
+            turmas = turmas_df["nome"].tolist() if not turmas_df.empty else []
+            materias = materias_df["nome"].tolist() if not materias_df.empty else []
 
-        if filtro_materia != "Todos":
-            df_filtrado = df_filtrado[df_filtrado["materia"] == filtro_materia]
+            render_busca()
 
-        if filtro_capitulo != "Todos":
-            df_filtrado = df_filtrado[df_filtrado["capitulo"] == filtro_capitulo]
+            st.subheader("🔎 Filtros")
 
-        if filtro_dias > 0:
-            df_filtrado = df_filtrado[
-                (df_filtrado["data_limite_da_entrega"].notna()) &
-                ((pd.to_datetime(df_filtrado["data_limite_da_entrega"]) - hoje).dt.days <= filtro_dias)
-            ]
+            col1, col2, col3, col4 = st.columns(4)
 
-        df_filtrado["alerta"] = df_filtrado["data_limite_da_entrega"].apply(
-            lambda d: "⚠️ Prazo próximo"
-            if pd.notna(d) and (pd.to_datetime(d) - hoje).days <= dias_alerta
-            else ""
-        )
+            filtro_turma = col1.selectbox(
+                "Turma",
+                ["Todos"] + turmas
+            )
 
-        df_filtrado["excluir"] = False
+            filtro_prof = col2.selectbox(
+                "Professor",
+                ["Todos"] + professores
+            )
 
-        st.subheader("✏️ Controle de Matérias")
+            filtro_materia = col3.selectbox(
+                "Matéria",
+                ["Todos"] + materias
+            )
 
-        edited_df = st.data_editor(
-            df_filtrado,
-            use_container_width=True,
-            num_rows="fixed",
-            key="editor_materias",
-            column_config={
-                "excluir": st.column_config.CheckboxColumn("🗑️ Excluir"),
-                "status": st.column_config.TextColumn(
-                    "Status",
-                    disabled = True
-                ),
-                "professor_titular": st.column_config.TextColumn(
-                    "Professor Titular"
-                ),
-                "data_limite_da_entrega": st.column_config.DateColumn(
-                    "Data Limite",
-                    format="DD/MM/YYYY"
-                ),
-                "data_da_entrega": st.column_config.DateColumn(
-                    "Data da Entrega",
-                    format="DD/MM/YYYY"
-                ),
-                "data_de_aprovacao_final": st.column_config.DateColumn(
-                    "Aprovação Final",
-                    format="DD/MM/YYYY"
-                ),
-                "alerta": st.column_config.TextColumn(
-                    "⚠️ Alerta",
-                    disabled=True
-                )
-            }
-        )
+            filtro_capitulo = col4.selectbox(
+                "Capítulo",
+                ["Todos"] + sorted(df["capitulo"].dropna().unique().tolist())
+            )
 
-        col_save, col_delete = st.columns(2)
-
-        # ===== SALVAR ALTERAÇÕES =====
-        if col_save.button("💾 Salvar alterações"):
-            session = get_session()
-            try:
-                for _, row in edited_df.iterrows():
-                    original = df[df["id"] == row["id"]].iloc[0]
-
-                    changes = {
-                        col: row[col]
-                        for col in df.columns
-                        if col not in ["alerta"] and row[col] != original[col]
-                    }
-
-                    if changes:
-                        set_clause = ", ".join([f"{k} = :{k}" for k in changes])
-                        sql = text(f"""
-                            UPDATE edumanager.controle_materia
-                            SET {set_clause}
-                            WHERE id = :id
-                        """)
-                        changes["id"] = row["id"]
-                        session.execute(sql, changes)
-
-                session.commit()
-                st.success("Alterações salvas com sucesso.")
-                st.rerun()
-
-            except Exception:
-                session.rollback()
-                LOGGER.exception("Erro ao salvar.")
-                st.error("Erro ao salvar alterações.")
-            finally:
-                session.close()
-
-        # ===== EXCLUIR =====
-        if col_delete.button("🗑️ Excluir selecionados"):
-            ids = edited_df[edited_df["excluir"] == True]["id"].tolist()
-
-            if not ids:
-                st.warning("Nenhum registro selecionado.")
-            else:
-                session = get_session()
-                try:
-                    for rid in ids:
-                        session.execute(
-                            text("DELETE FROM edumanager.controle_materia WHERE id = :id"),
-                            {"id": rid}
-                        )
-                    session.commit()
-                    st.success(f"{len(ids)} registro(s) excluído(s).")
-                    st.rerun()
-                except Exception:
-                    session.rollback()
-                    LOGGER.exception("Erro ao excluir.")
-                    st.error("Erro ao excluir registros.")
-                finally:
-                    session.close()
+            filtro_dias = st.number_input(
+                "Mostrar matérias com prazo em até (dias)",
+                min_value=0,
+                value=0,
+                help="0 = mostrar todas"
+            )
 
-    # ================= Cadastro =================
-    with tabs[1]:
-        professores_df = listar_professores()
-        professores = professores_df["nome"].tolist() if not professores_df.empty else []
-
-        st.subheader("📥 Cadastrar Matéria")
-        with st.form("form_cadastro"):
-            data = {
-                "turma": st.text_input("Turma"),
-                "materia": st.text_input("Matéria"),
-                "professor_titular": st.selectbox("Professor", professores),
-                "trimestre": st.text_input("Trimestre"),
-                "capitulo": st.text_input("Capítulo"),
-                "bloco": st.text_input("Bloco"),
-                "status": st.selectbox("Status", ["Não iniciado", "Em andamento", "Concluído"]),
-                "data_limite_da_entrega": st.date_input("Data Limite"),
-                "data_da_entrega": st.date_input("Data da Entrega"),
-                "validacao_operacional": st.text_input("Validação Operacional"),
-                "revisao_pedagogica": st.text_input("Revisão Pedagógica"),
-                "diagramacao": st.text_input("Diagramação"),
-                "data_de_aprovacao_final": st.date_input("Aprovação Final"),
-                "obs": st.text_area("Observações")
-            }
-
-            if st.form_submit_button("Salvar"):
-                insert_record(data)
-                st.success("Registro cadastrado.")
-                st.rerun()
-
-        st.divider()
-        st.subheader("📥 Importar Excel")
-
-        uploaded = st.file_uploader("Arquivo .xlsx", type=["xlsx"])
-
-        if uploaded:
-            df_excel = pd.read_excel(uploaded)
-            validar_colunas_excel(df_excel)
-            df_excel = df_excel.astype(str).replace({"nan": None, "NaT": None})
-
-            for _, row in df_excel.iterrows():
-                insert_record(row.to_dict())
-
-            st.success("Importação concluída.")
-            st.rerun()
-
-        # ================= CADASTRO DE BLOCO ==================
-        st.divider()
-        st.subheader("📥 Cadastrar Bloco")
-
-        with st.form("form_bloco"):
-            data = {
-                "bloco": st.text_input("Bloco"),
-                "data_limite_entrega": st.date_input("Data Limite")
-            }
-
-            if st.form_submit_button("Salvar"):
-                insert_bloco(data)
-                st.success("Bloco cadastrado.")
-                sleep(10)
-                st.rerun()
-
-    # ================= Cadastro de Usuário =================
-
-    with tabs[2]:
-        st.subheader("👤 Cadastro de Usuario")
-
-        new_email = st.text_input("user email")
-        new_pwd = st.text_input("senha")
-        new_status = st.selectbox("Status", ["super_admin", "admin", "reader"]) if st.session_state.status == "super_admin" else st.selectbox("Status", ["admin", "reader"])
-
-        if st.button("Adicionar"):
-            if new_email.strip():
-                cadastrar_novo_usuario(new_email.strip(), new_pwd, new_status)
-                st.success("Usuário cadastrado.")
-                sleep(10)
-                st.rerun()
-            else:
-                st.warning("Usuário não cadastro.")
-
-    # ================= Sobre =================
-    with tabs[3]:
-        st.subheader("📖 Sobre")
-
-        st.info(
-            """
-            **EduManager** v1.0
-           
-            Aplicação desenvolvida para otimizar o controle e gerenciamento 
-            de fluxos de matérias escolares, prazos e aprovações pedagógicas.
-        
-            **Desenvolvido por:**
-            Thiago Fernandes S. Almeida
-        
-            **Contato:**
-            thiago.fernandes.s.almeida@gmail.com
-            """
-        )
+            hoje = pd.Timestamp.today().normalize()
+            df_filtrado = df.copy()
 
-else:
-    tabs = st.tabs(["📊 Visualização", "📖 Sobre"])
-    # ================= Visualização =================
-    with tabs[0]:
-        df = fetch_all()
+            if filtro_turma != "Todos":
+                df_filtrado = df_filtrado[df_filtrado["turma"] == filtro_turma]
 
-        professores_df = listar_professores()
-        professores = professores_df["nome"].tolist() if not professores_df.empty else []
+            if filtro_prof != "Todos":
+                df_filtrado = df_filtrado[df_filtrado["professor_titular"] == filtro_prof]
 
-        st.subheader("🔎 Filtros")
+            if filtro_materia != "Todos":
+                df_filtrado = df_filtrado[df_filtrado["materia"] == filtro_materia]
 
-        col1, col2, col3, col4 = st.columns(4)
+            if filtro_capitulo != "Todos":
+                df_filtrado = df_filtrado[df_filtrado["capitulo"] == filtro_capitulo]
 
-        filtro_turma = col1.selectbox(
-            "Turma",
-            ["Todos"] + sorted(df["turma"].dropna().unique().tolist())
-        )
-
-        filtro_prof = col2.selectbox(
-            "Professor",
-            ["Todos"] + sorted(df["professor_titular"].dropna().unique().tolist())
-        )
-
-        filtro_materia = col3.selectbox(
-            "Matéria",
-            ["Todos"] + sorted(df["materia"].dropna().unique().tolist())
-        )
+            if filtro_dias > 0:
+                df_filtrado = df_filtrado[
+                    (df_filtrado["data_limite_da_entrega"].notna()) &
+                    ((pd.to_datetime(df_filtrado["data_limite_da_entrega"]) - hoje).dt.days <= filtro_dias)
+                ]
 
-        filtro_capitulo = col4.selectbox(
-            "Capítulo",
-            ["Todos"] + sorted(df["capitulo"].dropna().unique().tolist())
-        )
+            # Alertas vêm pré-calculados pelo agendador
+            df_filtrado["alerta"] = df_filtrado["id"].isin(alertas_df["registro_id"]).map(
+                {True: "⚠️ Prazo próximo", False: ""}
+            )
+
+            df_filtrado["excluir"] = False
+
+            st.subheader("✏️ Controle de Matérias")
+
+            edited_df = st.data_editor(
+                df_filtrado,
+                use_container_width=True,
+                num_rows="fixed",
+                key="editor_materias",
+                column_config={
+                    "excluir": st.column_config.CheckboxColumn("🗑️ Excluir"),
+                    "status": st.column_config.TextColumn(
+                        "Status",
+                        disabled = True
+                    ),
+                    "professor_titular": st.column_config.TextColumn(
+                        "Professor Titular"
+                    ),
+                    "data_limite_da_entrega": st.column_config.DateColumn(
+                        "Data Limite",
+                        format="DD/MM/YYYY"
+                    ),
+                    "data_da_entrega": st.column_config.DateColumn(
+                        "Data da Entrega",
+                        format="DD/MM/YYYY"
+                    ),
+                    "data_de_aprovacao_final": st.column_config.DateColumn(
+                        "Aprovação Final",
+                        format="DD/MM/YYYY"
+                    ),
+                    "alerta": st.column_config.TextColumn(
+                        "⚠️ Alerta",
+                        disabled=True
+                    )
+                }
+            )
+
+            col_save, col_delete = st.columns(2)
+
+            # ===== SALVAR ALTERAÇÕES =====
+            if col_save.button("💾 Salvar alterações"):
+                session = get_session()
+                try:
+                    for _, row in edited_df.iterrows():
+                        original = df[df["id"] == row["id"]].iloc[0]
+
+                        changes = {
+                            col: row[col]
+                            for col in df.columns
+                            if col not in ["alerta"] and row[col] != original[col]
+                        }
+
+                        if changes:
+                            set_clause = ", ".join([f"{k} = :{k}" for k in changes])
+                            set_clause += clausula_ano_letivo({k: k for k in changes})
+                            sql = text(f"""
+                                UPDATE edumanager.controle_materia
+                                SET {set_clause}
+                                WHERE id = :id
+                            """)
+                            changes["id"] = row["id"]
+                            session.execute(sql, changes)
 
-        filtro_dias = st.number_input(
-            "Mostrar matérias com prazo em até (dias)",
-            min_value=0,
-            value=0,
-            help="0 = mostrar todas"
-        )
+                    session.commit()
+                    agendador.notificar()
+                    st.success("Alterações salvas com sucesso.")
+                    st.rerun()
 
-        hoje = pd.Timestamp.today().normalize()
-        df_filtrado = df.copy()
+                except Exception:
+                    session.rollback()
+                    LOGGER.exception("Erro ao salvar.")
+                    st.error("Erro ao salvar alterações.")
+                finally:
+                    session.close()
 
-        if filtro_turma != "Todos":
-            df_filtrado = df_filtrado[df_filtrado["turma"] == filtro_turma]
+            # ===== EXCLUIR =====
+            if col_delete.button("🗑️ Excluir selecionados"):
+                ids = edited_df[edited_df["excluir"] == True]["id"].tolist()
+
+                if not ids:
+                    st.warning("Nenhum registro selecionado.")
+                else:
+                    session = get_session()
+                    try:
+                        for rid in ids:
+                            session.execute(
+                                text("DELETE FROM edumanager.controle_materia WHERE id = :id"),
+                                {"id": rid}
+                            )
+                        session.commit()
+                        agendador.notificar()
+                        st.success(f"{len(ids)} registro(s) excluído(s).")
+                        st.rerun()
+                    except Exception:
+                        session.rollback()
+                        LOGGER.exception("Erro ao excluir.")
+                        st.error("Erro ao excluir registros.")
+                    finally:
+                        session.close()
+
+            # ===== EDIÇÃO EM MASSA =====
+            with st.expander("✏️ Edição em massa (todos os registros filtrados)"):
+                filtros_massa = {
+                    coluna: valor
+                    for coluna, valor in {
+                        "turma": filtro_turma,
+                        "professor_titular": filtro_prof,
+                        "materia": filtro_materia,
+                        "capitulo": filtro_capitulo,
+                    }.items()
+                    if valor != "Todos"
+                }
+                if filtro_dias > 0:
+                    filtros_massa["prazo_dias"] = filtro_dias
+
+                # Registros arquivados aparecem na tabela mas não são alterados pelo UPDATE
+                if incluir_historico:
+                    st.warning(
+                        "Desmarque \"Incluir períodos arquivados\" para usar a edição em massa: "
+                        "registros arquivados não podem ser alterados."
+                    )
+                elif not filtros_massa:
+                    st.warning("Nenhum filtro ativo: a alteração vale para todos os registros.")
+
+                campo_massa = st.selectbox("Campo", CAMPOS_EDICAO_EM_MASSA, key="massa_campo")
+                tipo_massa = ESQUEMA_IMPORTACAO[campo_massa]["tipo"]
+
+                if tipo_massa == "data":
+                    valor_massa = st.date_input("Novo valor", value=None, key="massa_data", format="DD/MM/YYYY")
+                else:
+                    valor_massa = st.text_input("Novo valor", key="massa_texto").strip() or None
+
+                chave_massa = (tuple(sorted(filtros_massa.items())), campo_massa)
+
+                if st.button("🔎 Pré-visualizar", disabled=incluir_historico):
+                    st.session_state.massa_preview = (chave_massa, contar_registros(filtros_massa))
+
+                preview = st.session_state.get("massa_preview")
+                if preview and preview[0] == chave_massa and not incluir_historico:
+                    total_massa = preview[1]
+                    st.info(f"{total_massa} registro(s) terão **{campo_massa}** alterado para `{valor_massa}`.")
+
+                    if st.button(f"Aplicar a {total_massa} registro(s)", disabled=total_massa == 0):
+                        try:
+                            with log_duration(LOGGER, "edicao_em_massa", campo=campo_massa):
+                                linhas = atualizar_em_massa(filtros_massa, campo_massa, valor_massa)
+                            agendador.notificar()
+                            del st.session_state.massa_preview
+                            st.success(f"{linhas} registro(s) atualizado(s).")
+                            st.rerun()
+                        except ValueError as e:
+                            st.error(str(e))
+                        except Exception:
+                            LOGGER.exception("Erro na edição em massa.")
+                            st.error("Erro ao aplicar edição em massa.")
+
+        # ================= Cadastro =================
+        with tabs[1]:
+            professores_df = listar_professores()
+            professores = professores_df["nome"].tolist() if not professores_df.empty else []
+
+            st.subheader("📥 Cadastrar Matéria")
+            with st.form("form_cadastro"):
+                data = {
+                    "turma": st.text_input("Turma"),
+                    "materia": st.text_input("Matéria"),
+                    "professor_titular": st.selectbox("Professor", professores),
+                    "trimestre": st.text_input("Trimestre"),
+                    "capitulo": st.text_input("Capítulo"),
+                    "bloco": st.text_input("Bloco"),
+                    "status": st.selectbox("Status", STATUS_VALIDOS),
+                    "data_limite_da_entrega": st.date_input("Data Limite"),
+                    "data_da_entrega": st.date_input("Data da Entrega"),
+                    "validacao_operacional": st.text_input("Validação Operacional"),
+                    "revisao_pedagogica": st.text_input("Revisão Pedagógica"),
+                    "diagramacao": st.text_input("Diagramação"),
+                    "data_de_aprovacao_final": st.date_input("Aprovação Final"),
+                    "obs": st.text_area("Observações")
+                }
+
+                if st.form_submit_button("Salvar"):
+                    insert_record(data)
+                    agendador.notificar()
+                    st.success("Registro cadastrado.")
+                    st.rerun()
 
-        if filtro_prof != "Todos":
-            df_filtrado = df_filtrado[df_filtrado["professor_titular"] == filtro_prof]
+            st.divider()
+            st.subheader("📥 Importar Excel")
 
-        if filtro_materia != "Todos":
-            df_filtrado = df_filtrado[df_filtrado["materia"] == filtro_materia]
+            if "importacao_concluida" in st.session_state:
+                st.success(st.session_state.pop("importacao_concluida"))
 
-        if filtro_capitulo != "Todos":
-            df_filtrado = df_filtrado[df_filtrado["capitulo"] == filtro_capitulo]
+            # Trocar a key limpa o uploader depois de uma importação
+            versao_upload = st.session_state.get("versao_upload", 0)
+            uploaded = st.file_uploader(
+                "Arquivo .xlsx", type=["xlsx"], key=f"upload_excel_{versao_upload}"
+            )
 
-        if filtro_dias > 0:
-            df_filtrado = df_filtrado[
-                (df_filtrado["data_limite_da_entrega"].notna()) &
-                ((pd.to_datetime(df_filtrado["data_limite_da_entrega"]) - hoje).dt.days <= filtro_dias)
-                ]
+            if uploaded:
+                df_excel = pd.read_excel(uploaded)
 
-        df_filtrado["alerta"] = df_filtrado["data_limite_da_entrega"].apply(
-            lambda d: "⚠️ Prazo próximo"
-            if pd.notna(d) and (pd.to_datetime(d) - hoje).days <= dias_alerta
-            else ""
-        )
+                try:
+                    validos, erros = validar_importacao(df_excel)
+                except ValueError as e:
+                    st.error(str(e))
+                else:
+                    if not erros.empty:
+                        st.warning(
+                            f"{erros['linha'].nunique()} linha(s) com erro serão ignoradas."
+                        )
+                        st.dataframe(erros, use_container_width=True, hide_index=True)
+                        st.download_button(
+                            "⬇️ Baixar relatório de erros",
+                            erros.to_csv(index=False).encode("utf-8"),
+                            file_name="erros_importacao.csv",
+                            mime="text/csv"
+                        )
 
-        # df_filtrado["excluir"] = False
+                    if validos.empty:
+                        st.error("Nenhuma linha válida para importar.")
+                    elif st.button(f"Importar {len(validos)} linha(s) válida(s)"):
+                        with log_duration(LOGGER, "importar_excel", linhas=len(validos)):
+                            insert_records(validos.to_dict("records"))
+                        agendador.notificar()
+                        st.session_state.versao_upload = versao_upload + 1
+                        st.session_state.importacao_concluida = (
+                            f"Importação concluída: {len(validos)} linha(s)."
+                        )
+                        st.rerun()
+
+            # ================= CADASTRO DE BLOCO ==================
+            st.divider()
+            st.subheader("📥 Cadastrar Bloco")
+
+            with st.form("form_bloco"):
+                data = {
+                    "bloco": st.text_input("Bloco"),
+                    "data_limite_entrega": st.date_input("Data Limite")
+                }
+
+                if st.form_submit_button("Salvar"):
+                    insert_bloco(data)
+                    agendador.notificar(completo=True)
+                    st.success("Bloco cadastrado.")
+                    sleep(10)
+                    st.rerun()
 
-        st.subheader("✏️ Controle de Matérias")
+            # ================= ARQUIVAR PERÍODO ==================
+            st.divider()
+            st.subheader("🗄️ Arquivar Período")
 
-        edited_df = st.data_editor(
-            df_filtrado,
-            use_container_width=True,
-            num_rows="fixed",
-            key="editor_materias",
-            column_config={
-                "excluir": st.column_config.CheckboxColumn("🗑️ Excluir"),
-                "status": st.column_config.SelectboxColumn(
-                    "Status",
-                    options=["Não iniciado", "Em andamento", "Concluído"]
-                ),
-                "professor_titular": st.column_config.TextColumn(
-                    "Professor Titular"
-                ),
-                "data_limite_da_entrega": st.column_config.DateColumn(
-                    "Data Limite",
-                    format="DD/MM/YYYY"
-                ),
-                "data_da_entrega": st.column_config.DateColumn(
-                    "Data da Entrega",
-                    format="DD/MM/YYYY"
-                ),
-                "data_de_aprovacao_final": st.column_config.DateColumn(
-                    "Aprovação Final",
-                    format="DD/MM/YYYY"
-                ),
-                "alerta": st.column_config.TextColumn(
-                    "⚠️ Alerta",
-                    disabled=True
+            with st.form("form_arquivo"):
+                ano_arquivo = st.number_input(
+                    "Ano letivo",
+                    min_value=2000,
+                    max_value=pd.Timestamp.today().year,
+                    value=pd.Timestamp.today().year - 1
                 )
-            }, disabled=True
-        )
-
-        col_save, col_delete = st.columns(2)
+                destino_arquivo = st.radio(
+                    "Destino",
+                    ["frio", "parquet"],
+                    format_func=lambda d: {
+                        "frio": "Partição fria (no banco)",
+                        "parquet": "Arquivo Parquet compactado"
+                    }[d],
+                    horizontal=True
+                )
+                forcar_arquivo = st.checkbox("Arquivar mesmo com registros sem aprovação final")
+
+                if st.form_submit_button("Arquivar"):
+                    try:
+                        resultado = arquivar_periodo(ano_arquivo, destino_arquivo, forcar_arquivo)
+                        st.success(
+                            f"{resultado['linhas']} registro(s) de {ano_arquivo} "
+                            f"arquivado(s) em {resultado['local']}."
+                        )
+                    except ValueError as e:
+                        st.error(str(e))
+                    except Exception:
+                        LOGGER.exception("Erro ao arquivar período.")
+                        st.error("Erro ao arquivar período.")
+
+        # ================= Cadastro de Usuário =================
+
+        with tabs[2]:
+            st.subheader("👤 Cadastro de Usuario")
+
+            new_email = st.text_input("user email")
+            new_pwd = st.text_input("senha")
+            new_status = st.selectbox("Status", ["super_admin", "admin", "reader"]) if st.session_state.status == "super_admin" else st.selectbox("Status", ["admin", "reader"])
+
+            if st.button("Adicionar"):
+                if new_email.strip():
+                    cadastrar_novo_usuario(new_email.strip(), new_pwd, new_status)
+                    st.success("Usuário cadastrado.")
+                    sleep(10)
+                    st.rerun()
+                else:
+                    st.warning("Usuário não cadastro.")
 
         # ================= Sobre =================
-    with tabs[1]:
-        st.subheader("📖 Sobre")
-
-        st.info(
-            """
-            **EduManager** v1.0
-
-            Aplicação desenvolvida para otimizar o controle e gerenciamento 
-            de fluxos de matérias escolares, prazos e aprovações pedagógicas.
+        with tabs[3]:
+            st.subheader("📖 Sobre")
 
-            **Desenvolvido por:**
-            Thiago Fernandes S. Almeida
+            st.info(
+                """
+                **EduManager** v1.0
+           
+                Aplicação desenvolvida para otimizar o controle e gerenciamento 
+                de fluxos de matérias escolares, prazos e aprovações pedagógicas.
+        
+                **Desenvolvido por:**
+                Thiago Fernandes S. Almeida
+        
+                **Contato:**
+                thiago.fernandes.s.almeida@gmail.com
+                """
+            )
+
+    else:
+        tabs = st.tabs(["📊 Visualização", "📖 Sobre"])
+        # ================= Visualização =================
+        with tabs[0]:
+            with log_duration(LOGGER, "carregar_visualizacao"):
+                dados = carregar_pagina(
+                    registros=partial(fetch_all, incluir_historico=incluir_historico),
+                    professores=listar_professores,
+                    turmas=listar_turmas,
+                    materias=listar_materias,
+                    alertas=partial(listar_alertas, dias_alerta),
+                )
 
-            **Contato:**
-            thiago.fernandes.s.almeida@gmail.com
-            """
-        )
\ No newline at end of file
+            df = dados["registros"]
+            professores_df = dados["professores"]
+            turmas_df = dados["turmas"]
+            materias_df = dados["materias"]
+            alertas_df = dados["alertas"]
+
+            professores = professores_df["nome"].tolist() if not professores_df.empty else []
+            turmas = turmas_df["nome"].tolist() if not turmas_df.empty else []
+            materias = materias_df["nome"].tolist() if not materias_df.empty else []
+
+            render_busca()
+
+            st.subheader("🔎 Filtros")
+
+            col1, col2, col3, col4 = st.columns(4)
+
+            filtro_turma = col1.selectbox(
+                "Turma",
+                ["Todos"] + turmas
+            )
+
+            filtro_prof = col2.selectbox(
+                "Professor",
+                ["Todos"] + professores
+            )
+
+            filtro_materia = col3.selectbox(
+                "Matéria",
+                ["Todos"] + materias
+            )
+
+            filtro_capitulo = col4.selectbox(
+                "Capítulo",
+                ["Todos"] + sorted(df["capitulo"].dropna().unique().tolist())
+            )
+
+            filtro_dias = st.number_input(
+                "Mostrar matérias com prazo em até (dias)",
+                min_value=0,
+                value=0,
+                help="0 = mostrar todas"
+            )
+
+            hoje = pd.Timestamp.today().normalize()
+            df_filtrado = df.copy()
+
+            if filtro_turma != "Todos":
+                df_filtrado = df_filtrado[df_filtrado["turma"] == filtro_turma]
+
+            if filtro_prof != "Todos":
+                df_filtrado = df_filtrado[df_filtrado["professor_titular"] == filtro_prof]
+
+            if filtro_materia != "Todos":
+                df_filtrado = df_filtrado[df_filtrado["materia"] == filtro_materia]
+
+            if filtro_capitulo != "Todos":
+                df_filtrado = df_filtrado[df_filtrado["capitulo"] == filtro_capitulo]
+
+            if filtro_dias > 0:
+                df_filtrado = df_filtrado[
+                    (df_filtrado["data_limite_da_entrega"].notna()) &
+                    ((pd.to_datetime(df_filtrado["data_limite_da_entrega"]) - hoje).dt.days <= filtro_dias)
+                    ]
+
+            # Alertas vêm pré-calculados pelo agendador
+            df_filtrado["alerta"] = df_filtrado["id"].isin(alertas_df["registro_id"]).map(
+                {True: "⚠️ Prazo próximo", False: ""}
+            )
+
+            # df_filtrado["excluir"] = False
+
+            st.subheader("✏️ Controle de Matérias")
+
+            edited_df = st.data_editor(
+                df_filtrado,
+                use_container_width=True,
+                num_rows="fixed",
+                key="editor_materias",
+                column_config={
+                    "excluir": st.column_config.CheckboxColumn("🗑️ Excluir"),
+                    "status": st.column_config.SelectboxColumn(
+                        "Status",
+                        options=STATUS_VALIDOS
+                    ),
+                    "professor_titular": st.column_config.TextColumn(
+                        "Professor Titular"
+                    ),
+                    "data_limite_da_entrega": st.column_config.DateColumn(
+                        "Data Limite",
+                        format="DD/MM/YYYY"
+                    ),
+                    "data_da_entrega": st.column_config.DateColumn(
+                        "Data da Entrega",
+                        format="DD/MM/YYYY"
+                    ),
+                    "data_de_aprovacao_final": st.column_config.DateColumn(
+                        "Aprovação Final",
+                        format="DD/MM/YYYY"
+                    ),
+                    "alerta": st.column_config.TextColumn(
+                        "⚠️ Alerta",
+                        disabled=True
+                    )
+                }, disabled=True
+            )
+
+            col_save, col_delete = st.columns(2)
+
+            # ================= Sobre =================
+        with tabs[1]:
+            st.subheader("📖 Sobre")
+
+            st.info(
+                """
+                **EduManager** v1.0
+
+                Aplicação desenvolvida para otimizar o controle e gerenciamento 
+                de fluxos de matérias escolares, prazos e aprovações pedagógicas.
+
+                **Desenvolvido por:**
+                Thiago Fernandes S. Almeida
+
+                **Contato:**
+                thiago.fernandes.s.almeida@gmail.com
+                """
+            )
\ No newline at end of file
@@ -1,9 +1,17 @@
 import os
+import time
 import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+from pathlib import Path
 import duckdb as db
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import column, create_engine, event, insert, table, text
 from sqlalchemy.orm import sessionmaker
+from logger_config import log_duration
 
 LOGGER = logging.getLogger("database")
 
@@ -17,13 +25,185 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL não definida")
 
+# No modo supervisor (run_app.py --workers N) cada worker recebe sua fatia
+# do orçamento de conexões do servidor por estas variáveis.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,   # acorda o Neon automaticamente
-    pool_size=5,
-    max_overflow=10,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+)
+
+# ======================================================
+# Réplica de leitura (opcional)
+# ======================================================
+
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+# Acima desse atraso (segundos) a réplica é ignorada
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5))
+# Janela após uma escrita em que as leituras continuam no primário
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+# Intervalo de cache da medição de atraso
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", 2))
+# Tempo máximo (segundos) para conectar na réplica antes de desistir dela
+REPLICA_CONNECT_TIMEOUT = int(os.getenv("REPLICA_CONNECT_TIMEOUT", 2))
+
+replica_engine = create_engine(
+    DATABASE_REPLICA_URL,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    connect_args={"connect_timeout": REPLICA_CONNECT_TIMEOUT},
+) if DATABASE_REPLICA_URL else None
+
+_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END AS lag
+""")
+
+class SessaoLeitura:
+    """Momento da última escrita de uma sessão de usuário (read-your-writes)."""
+
+    def __init__(self):
+        self.ultima_escrita = 0.0
+
+
+# Sessão do usuário atual; threads sem sessão (agendador, DDL) ficam com None
+_sessao_leitura: contextvars.ContextVar[SessaoLeitura | None] = contextvars.ContextVar(
+    "sessao_leitura", default=None
+)
+
+_lag_cache: tuple[float, float | None] = (0.0, None)
+_lag_medindo = False
+_lag_lock = threading.Lock()
+
+
+def set_sessao_leitura(sessao: SessaoLeitura | None):
+    """
+    Associa a thread atual (e as tarefas de carregar_pagina, que copiam o
+    contexto) à sessão do usuário. Chamar a cada rerun.
+    """
+    _sessao_leitura.set(sessao)
+
+
+@event.listens_for(engine, "commit")
+def _registrar_escrita(conn):
+    # Só commits feitos em nome de uma sessão abrem a janela de
+    # read-your-writes, e só para essa sessão.
+    sessao = _sessao_leitura.get()
+    if sessao is not None:
+        sessao.ultima_escrita = time.monotonic()
+
+
+def replica_lag() -> float | None:
+    """
+    Atraso da réplica em segundos; None se indisponível ou desconhecido.
+    A consulta roda fora do lock: enquanto uma thread mede, as demais
+    recebem o último valor conhecido.
+    """
+    global _lag_cache, _lag_medindo
+
+    with _lag_lock:
+        medido_em, lag = _lag_cache
+        if _lag_medindo or time.monotonic() - medido_em < REPLICA_LAG_CHECK_SECONDS:
+            return lag
+        _lag_medindo = True
+
+    try:
+        with replica_engine.connect() as conn:
+            valor = conn.execute(_LAG_SQL).scalar()
+        lag = float(valor) if valor is not None else None
+    except Exception:
+        LOGGER.warning("Réplica indisponível.", exc_info=True)
+        lag = None
+    finally:
+        with _lag_lock:
+            _lag_cache = (time.monotonic(), lag)
+            _lag_medindo = False
+
+    return lag
+
+
+def get_read_engine(primary: bool = False):
+    """
+    Engine para consultas somente leitura: a réplica, salvo se não configurada,
+    se a sessão atual escreveu há pouco, ou se o atraso passar do limite.
+    """
+    if primary or replica_engine is None:
+        return engine
+
+    sessao = _sessao_leitura.get()
+    if sessao is not None and time.monotonic() - sessao.ultima_escrita < READ_YOUR_WRITES_SECONDS:
+        return engine
+
+    lag = replica_lag()
+    if lag is None or lag > REPLICA_MAX_LAG_SECONDS:
+        LOGGER.info("Leitura desviada para o primário.", extra={"replica_lag": lag})
+        return engine
+
+    return replica_engine
+
+
+# ======================================================
+# Carregamento concorrente de páginas
+# ======================================================
+
+# Consultas simultâneas por processo; não passa do que o pool consegue atender
+PAGE_LOAD_WORKERS = int(os.getenv(
+    "PAGE_LOAD_WORKERS", min(8, DB_POOL_SIZE + DB_MAX_OVERFLOW)
+))
+
+# Context manager opcional em volta de cada tarefa (o app liga o profiler
+# aqui); as tarefas herdam o valor da thread que chamou carregar_pagina.
+_envoltorio_tarefa: contextvars.ContextVar = contextvars.ContextVar(
+    "envoltorio_tarefa", default=None
+)
+
+def set_envoltorio_tarefa(envoltorio):
+    """Define a fábrica de context manager usada em cada tarefa, ou None."""
+    _envoltorio_tarefa.set(envoltorio)
+
+_page_executor = ThreadPoolExecutor(
+    max_workers=PAGE_LOAD_WORKERS,
+    thread_name_prefix="carregar-pagina",
 )
 
+def carregar_pagina(**consultas) -> dict:
+    """
+    Executa consultas de leitura independentes ao mesmo tempo e devolve
+    {nome: resultado} quando todas terminam. A latência da página fica perto
+    da consulta mais lenta, e não da soma delas.
+
+        dados = carregar_pagina(
+            registros=fetch_all,
+            alertas=partial(listar_alertas, 7),
+        )
+
+    Se alguma consulta falhar, a exceção dela é relançada aqui.
+    """
+    futuros = {
+        # Cada tarefa leva uma cópia do contexto (request_id/rerun_id dos logs)
+        nome: _page_executor.submit(
+            contextvars.copy_context().run, _executar_consulta, nome, consulta
+        )
+        for nome, consulta in consultas.items()
+    }
+    return {nome: futuro.result() for nome, futuro in futuros.items()}
+
+def _executar_consulta(nome: str, consulta):
+    envoltorio = _envoltorio_tarefa.get()
+    with envoltorio() if envoltorio else nullcontext():
+        with log_duration(LOGGER, "consulta", consulta=nome):
+            return consulta()
+
+
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
@@ -37,12 +217,14 @@ def get_session():
 # DDL
 # ======================================================
 
-def create_table():
-    sql = """
-    CREATE SCHEMA IF NOT EXISTS edumanager;
+# Período letivo de um registro: ano do primeiro prazo/data preenchido
+_ANO_LETIVO_SQL = """EXTRACT(YEAR FROM COALESCE(
+    data_limite_da_entrega, data_da_entrega, data_de_aprovacao_final, current_date
+))::int"""
 
-    CREATE TABLE IF NOT EXISTS edumanager.controle_materia (
-        id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+_DDL_CONTROLE_MATERIA = """
+    CREATE TABLE edumanager.controle_materia (
+        id BIGINT GENERATED ALWAYS AS IDENTITY,
         turma VARCHAR,
         materia VARCHAR,
         professor_titular VARCHAR,
@@ -56,14 +238,140 @@ def create_table():
         revisao_pedagogica VARCHAR,
         diagramacao VARCHAR,
         data_de_aprovacao_final DATE,
-        obs VARCHAR
-    );
+        obs VARCHAR,
+        ano_letivo INTEGER NOT NULL DEFAULT EXTRACT(YEAR FROM current_date)::int,
+        PRIMARY KEY (id, ano_letivo)
+    ) PARTITION BY LIST (ano_letivo);
+
+    CREATE TABLE edumanager.controle_materia_default
+        PARTITION OF edumanager.controle_materia DEFAULT;
+"""
+
+# Colunas que definem o período letivo, em ordem de prioridade
+_COLUNAS_ANO_LETIVO = ("data_limite_da_entrega", "data_da_entrega", "data_de_aprovacao_final")
+
+def clausula_ano_letivo(alteradas: dict[str, str]) -> str:
+    """
+    Trecho ", ano_letivo = ..." para o SET de um UPDATE em controle_materia.
+    `alteradas` mapeia as colunas alteradas pelo UPDATE para o nome do
+    parâmetro com o valor novo (no SET as colunas ainda têm o valor antigo).
+    Mudar a chave de partição no próprio SET faz o PostgreSQL mover a linha.
+    Vazio se nenhuma data muda; sem datas, mantém o ano atual do registro.
+    """
+    if not set(alteradas) & set(_COLUNAS_ANO_LETIVO):
+        return ""
+
+    datas = ", ".join(
+        f"CAST(:{alteradas[c]} AS DATE)" if c in alteradas else c
+        for c in _COLUNAS_ANO_LETIVO
+    )
+    return f", ano_letivo = COALESCE(EXTRACT(YEAR FROM COALESCE({datas}))::int, ano_letivo)"
+
+def _tipo_tabela(conn, nome: str) -> str | None:
+    """relkind da tabela no schema edumanager: 'r' comum, 'p' particionada."""
+    return conn.execute(text("""
+        SELECT c.relkind
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'edumanager' AND c.relname = :nome
+    """), {"nome": nome}).scalar()
+
+def _colunas_fisicas(conn, nome: str) -> list[str]:
+    """Colunas graváveis (exclui as GENERATED) de uma tabela do schema edumanager."""
+    return conn.execute(text("""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = 'edumanager'
+          AND table_name = :nome
+          AND is_generated = 'NEVER'
+        ORDER BY ordinal_position
+    """), {"nome": nome}).scalars().all()
+
+def create_table():
+    """
+    Cria controle_materia particionada por ano letivo. Se existir a versão
+    antiga (tabela comum), migra os dados para a particionada.
     """
     with engine.begin() as conn:
-        conn.execute(text(sql))
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS edumanager"))
 
+        tipo = _tipo_tabela(conn, "controle_materia")
+        if tipo is None:
+            conn.execute(text(_DDL_CONTROLE_MATERIA))
+        elif tipo == "r":
+            _migrar_para_particionada(conn)
+
+    garantir_particoes()
     LOGGER.info("Tabela controle_materia verificada/criada.")
 
+def garantir_particoes():
+    """Partições do ano corrente e do seguinte. Só consulta o catálogo se já existirem."""
+    ano = date.today().year
+    with engine.begin() as conn:
+        _garantir_particao(conn, ano)
+        _garantir_particao(conn, ano + 1)
+
+def _migrar_para_particionada(conn):
+    LOGGER.info("Migrando controle_materia para tabela particionada.")
+
+    # Libera os nomes do PK e dos índices de busca para a nova tabela
+    conn.execute(text("""
+        DROP INDEX IF EXISTS edumanager.idx_controle_materia_busca;
+        DROP INDEX IF EXISTS edumanager.idx_controle_materia_busca_trgm;
+        ALTER TABLE edumanager.controle_materia RENAME TO controle_materia_legado;
+        ALTER TABLE edumanager.controle_materia_legado
+            RENAME CONSTRAINT controle_materia_pkey TO controle_materia_legado_pkey;
+    """))
+    conn.execute(text(_DDL_CONTROLE_MATERIA))
+
+    anos = conn.execute(text(f"""
+        SELECT DISTINCT {_ANO_LETIVO_SQL} FROM edumanager.controle_materia_legado
+    """)).scalars().all()
+    for ano in anos:
+        _garantir_particao(conn, ano)
+
+    colunas = [
+        c for c in _colunas_fisicas(conn, "controle_materia_legado")
+        if c != "ano_letivo"
+    ]
+    lista = ", ".join(colunas)
+    conn.execute(text(f"""
+        INSERT INTO edumanager.controle_materia ({lista}, ano_letivo)
+        OVERRIDING SYSTEM VALUE
+        SELECT {lista}, {_ANO_LETIVO_SQL}
+        FROM edumanager.controle_materia_legado
+    """))
+    conn.execute(text("""
+        SELECT setval(
+            pg_get_serial_sequence('edumanager.controle_materia', 'id'),
+            COALESCE((SELECT MAX(id) FROM edumanager.controle_materia), 0) + 1,
+            false
+        );
+        DROP TABLE edumanager.controle_materia_legado;
+    """))
+
+def _garantir_particao(conn, ano: int):
+    """
+    Cria a partição do ano se ainda não existir, movendo para ela as linhas
+    desse ano que tenham caído na partição DEFAULT.
+    """
+    particao = f"controle_materia_{int(ano)}"
+    if _tipo_tabela(conn, particao) is not None:
+        return
+
+    colunas = ", ".join(_colunas_fisicas(conn, "controle_materia"))
+    conn.execute(text(f"""
+        CREATE TEMP TABLE _mover AS
+            SELECT {colunas} FROM edumanager.controle_materia_default
+            WHERE ano_letivo = :ano;
+        DELETE FROM edumanager.controle_materia_default WHERE ano_letivo = :ano;
+        CREATE TABLE edumanager.{particao}
+            PARTITION OF edumanager.controle_materia FOR VALUES IN ({int(ano)});
+        INSERT INTO edumanager.controle_materia ({colunas})
+            OVERRIDING SYSTEM VALUE SELECT {colunas} FROM _mover;
+        DROP TABLE _mover;
+    """), {"ano": int(ano)})
+
 def create_professores_table():
     sql = """
     CREATE TABLE IF NOT EXISTS edumanager.professores (
@@ -76,17 +384,621 @@ def create_professores_table():
 
     LOGGER.info("Tabela professores verificada/criada.")
 
+def create_dimensoes():
+    """
+    Dimensões turma/matéria/professor com chaves inteiras em controle_materia.
+    Um trigger resolve (e cria, se preciso) os ids a partir dos nomes em cada
+    INSERT/UPDATE, então quem grava continua mandando só os nomes; fetch_all
+    e os filtros leem pelos ids. Registros já existentes são migrados aqui.
+    """
+    sql = """
+    CREATE TABLE IF NOT EXISTS edumanager.turmas (
+        id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+        nome VARCHAR UNIQUE
+    );
+
+    CREATE TABLE IF NOT EXISTS edumanager.materias (
+        id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+        nome VARCHAR UNIQUE
+    );
+
+    ALTER TABLE edumanager.controle_materia
+        ADD COLUMN IF NOT EXISTS turma_id BIGINT REFERENCES edumanager.turmas (id),
+        ADD COLUMN IF NOT EXISTS materia_id BIGINT REFERENCES edumanager.materias (id),
+        ADD COLUMN IF NOT EXISTS professor_id BIGINT REFERENCES edumanager.professores (id);
+
+    CREATE INDEX IF NOT EXISTS idx_controle_materia_turma_id
+        ON edumanager.controle_materia (turma_id);
+    CREATE INDEX IF NOT EXISTS idx_controle_materia_materia_id
+        ON edumanager.controle_materia (materia_id);
+    CREATE INDEX IF NOT EXISTS idx_controle_materia_professor_id
+        ON edumanager.controle_materia (professor_id);
+
+    CREATE OR REPLACE FUNCTION edumanager.resolver_dimensoes() RETURNS trigger AS $$
+    BEGIN
+        SELECT id INTO NEW.turma_id FROM edumanager.turmas WHERE nome = NEW.turma;
+        IF NEW.turma IS NOT NULL AND NEW.turma_id IS NULL THEN
+            INSERT INTO edumanager.turmas (nome) VALUES (NEW.turma)
+            ON CONFLICT (nome) DO UPDATE SET nome = EXCLUDED.nome
+            RETURNING id INTO NEW.turma_id;
+        END IF;
+
+        SELECT id INTO NEW.materia_id FROM edumanager.materias WHERE nome = NEW.materia;
+        IF NEW.materia IS NOT NULL AND NEW.materia_id IS NULL THEN
+            INSERT INTO edumanager.materias (nome) VALUES (NEW.materia)
+            ON CONFLICT (nome) DO UPDATE SET nome = EXCLUDED.nome
+            RETURNING id INTO NEW.materia_id;
+        END IF;
+
+        SELECT id INTO NEW.professor_id FROM edumanager.professores
+            WHERE nome = NEW.professor_titular;
+        IF NEW.professor_titular IS NOT NULL AND NEW.professor_id IS NULL THEN
+            INSERT INTO edumanager.professores (nome) VALUES (NEW.professor_titular)
+            ON CONFLICT (nome) DO UPDATE SET nome = EXCLUDED.nome
+            RETURNING id INTO NEW.professor_id;
+        END IF;
+
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE TRIGGER trg_controle_materia_dimensoes
+        BEFORE INSERT OR UPDATE OF turma, materia, professor_titular
+        ON edumanager.controle_materia
+        FOR EACH ROW EXECUTE FUNCTION edumanager.resolver_dimensoes();
+
+    -- Migração dos registros existentes
+    INSERT INTO edumanager.turmas (nome)
+        SELECT DISTINCT turma FROM edumanager.controle_materia
+        WHERE turma IS NOT NULL AND turma_id IS NULL
+    ON CONFLICT (nome) DO NOTHING;
+
+    INSERT INTO edumanager.materias (nome)
+        SELECT DISTINCT materia FROM edumanager.controle_materia
+        WHERE materia IS NOT NULL AND materia_id IS NULL
+    ON CONFLICT (nome) DO NOTHING;
+
+    INSERT INTO edumanager.professores (nome)
+        SELECT DISTINCT professor_titular FROM edumanager.controle_materia
+        WHERE professor_titular IS NOT NULL AND professor_id IS NULL
+    ON CONFLICT (nome) DO NOTHING;
+
+    UPDATE edumanager.controle_materia a SET turma_id = d.id
+        FROM edumanager.turmas d
+        WHERE d.nome = a.turma AND a.turma_id IS NULL;
+
+    UPDATE edumanager.controle_materia a SET materia_id = d.id
+        FROM edumanager.materias d
+        WHERE d.nome = a.materia AND a.materia_id IS NULL;
+
+    UPDATE edumanager.controle_materia a SET professor_id = d.id
+        FROM edumanager.professores d
+        WHERE d.nome = a.professor_titular AND a.professor_id IS NULL;
+    """
+    with engine.begin() as conn:
+        conn.execute(text(sql))
+
+    LOGGER.info("Dimensões turma/matéria/professor verificadas/criadas.")
+
+# Expressão usada na busca parcial (pg_trgm). Precisa ser idêntica à do índice.
+_TEXTO_BUSCA = """(
+    coalesce(materia, '') || ' ' || coalesce(capitulo, '') || ' ' ||
+    coalesce(professor_titular, '') || ' ' || coalesce(obs, '')
+)"""
+
+def create_search_index():
+    sql = f"""
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+    ALTER TABLE edumanager.controle_materia
+        ADD COLUMN IF NOT EXISTS busca tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('portuguese', coalesce(materia, '')), 'A') ||
+            setweight(to_tsvector('portuguese', coalesce(capitulo, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(professor_titular, '')), 'B') ||
+            setweight(to_tsvector('portuguese', coalesce(obs, '')), 'C')
+        ) STORED;
+
+    CREATE INDEX IF NOT EXISTS idx_controle_materia_busca
+        ON edumanager.controle_materia USING GIN (busca);
+
+    CREATE INDEX IF NOT EXISTS idx_controle_materia_busca_trgm
+        ON edumanager.controle_materia USING GIN ({_TEXTO_BUSCA} gin_trgm_ops);
+    """
+    with engine.begin() as conn:
+        conn.execute(text(sql))
+
+    LOGGER.info("Índices de busca verificados/criados.")
+
+# ======================================================
+# Arquivo de períodos encerrados
+# ======================================================
+
+ARCHIVE_DIR = Path(os.getenv("ARCHIVE_DIR", "arquivo"))
+# Tablespace opcional (disco mais barato) para as partições frias
+ARCHIVE_TABLESPACE = os.getenv("ARCHIVE_TABLESPACE")
+
+# Colunas devolvidas por fetch_all, na mesma ordem
+_COLUNAS_REGISTRO = [
+    "id", "turma", "materia", "professor_titular", "trimestre", "capitulo",
+    "bloco", "grupo", "status", "data_limite_da_entrega", "data_da_entrega",
+    "validacao_operacional", "revisao_pedagogica", "diagramacao",
+    "data_de_aprovacao_final", "obs",
+]
+
+def create_arquivo_table():
+    sql = """
+    CREATE TABLE IF NOT EXISTS edumanager.periodos_arquivados (
+        ano_letivo INTEGER PRIMARY KEY,
+        destino VARCHAR NOT NULL,
+        local VARCHAR NOT NULL,
+        linhas BIGINT,
+        arquivado_em TIMESTAMPTZ DEFAULT now()
+    );
+    """
+    with engine.begin() as conn:
+        conn.execute(text(sql))
+
+    LOGGER.info("Tabela periodos_arquivados verificada/criada.")
+
+def arquivar_periodo(ano: int, destino: str = "frio", forcar: bool = False) -> dict:
+    """
+    Tira o ano letivo das partições ativas, de modo que fetch_all deixa de lê-lo.
+
+    destino="frio": a partição é desanexada e renomeada para
+    controle_materia_arquivo_<ano> (e movida para ARCHIVE_TABLESPACE, se definido).
+    destino="parquet": os dados vão para ARCHIVE_DIR/controle_materia_<ano>.parquet
+    (zstd) e a partição é removida do banco.
+
+    Só períodos encerrados (todas as linhas com data_de_aprovacao_final) são
+    arquivados, salvo forcar=True.
+    """
+    if destino not in ("frio", "parquet"):
+        raise ValueError(f"Destino inválido: {destino}")
+
+    ano = int(ano)
+    particao = f"controle_materia_{ano}"
+
+    with engine.begin() as conn:
+        arquivado = conn.execute(text("""
+            SELECT destino, local FROM edumanager.periodos_arquivados
+            WHERE ano_letivo = :ano
+        """), {"ano": ano}).first()
+        if arquivado:
+            raise ValueError(
+                f"{ano} já foi arquivado ({arquivado.destino}: {arquivado.local})."
+            )
+
+        if _tipo_tabela(conn, particao) is None:
+            # Linhas do ano podem estar na DEFAULT; separa antes de arquivar
+            _garantir_particao(conn, ano)
+
+        linhas, abertas = conn.execute(text(f"""
+            SELECT count(*), count(*) FILTER (WHERE data_de_aprovacao_final IS NULL)
+            FROM edumanager.{particao}
+        """)).one()
+
+        if abertas and not forcar:
+            raise ValueError(
+                f"{ano} tem {abertas} registro(s) sem aprovação final; "
+                "use forcar=True para arquivar mesmo assim."
+            )
+
+        conn.execute(text(f"""
+            ALTER TABLE edumanager.controle_materia DETACH PARTITION edumanager.{particao}
+        """))
+
+        if destino == "frio":
+            local = f"controle_materia_arquivo_{ano}"
+            conn.execute(text(f"ALTER TABLE edumanager.{particao} RENAME TO {local}"))
+            if ARCHIVE_TABLESPACE:
+                conn.execute(text(
+                    f"ALTER TABLE edumanager.{local} SET TABLESPACE {ARCHIVE_TABLESPACE}"
+                ))
+        else:
+            colunas = ", ".join(_colunas_fisicas(conn, particao))
+            result = conn.execute(text(f"SELECT {colunas} FROM edumanager.{particao}"))
+            registros = pd.DataFrame(result.fetchall(), columns=result.keys())
+            local = str(_gravar_parquet(registros, ARCHIVE_DIR / f"{particao}.parquet"))
+            conn.execute(text(f"DROP TABLE edumanager.{particao}"))
+
+        conn.execute(text("""
+            INSERT INTO edumanager.periodos_arquivados (ano_letivo, destino, local, linhas)
+            VALUES (:ano, :destino, :local, :linhas)
+        """), {"ano": ano, "destino": destino, "local": local, "linhas": linhas})
+
+    LOGGER.info(
+        "Período arquivado.",
+        extra={"ano_letivo": ano, "destino": destino, "linhas": linhas}
+    )
+    return {"ano_letivo": ano, "destino": destino, "local": local, "linhas": linhas}
+
+def _gravar_parquet(df: pd.DataFrame, caminho: Path) -> Path:
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    destino = str(caminho.resolve()).replace("'", "''")
+
+    # Sem isso, uma coluna de data toda vazia vira tipo NULL/INTEGER no Parquet
+    df = df.copy()
+    for coluna in df.columns:
+        if coluna.startswith("data_"):
+            df[coluna] = pd.to_datetime(df[coluna], errors="coerce")
+
+    con = db.connect()
+    try:
+        con.register("registros", df)
+        con.execute(f"COPY registros TO '{destino}' (FORMAT parquet, COMPRESSION zstd)")
+    finally:
+        con.close()
+    return caminho
+
+def fetch_historico(filters: dict | None = None, primary: bool = False) -> pd.DataFrame:
+    """
+    Registros dos períodos arquivados, com as mesmas colunas de fetch_all.
+    Os arquivos guardam os nomes, então os filtros por id não são aceitos.
+    """
+    montar_filtros(filters)  # valida as colunas
+    por_id = {k for k in (filters or {}) if k.endswith("_id")}
+    if por_id:
+        raise ValueError(f"Filtros por id não se aplicam aos períodos arquivados: {por_id}")
+
+    with get_read_engine(primary).connect() as conn:
+        periodos = conn.execute(text("""
+            SELECT ano_letivo, destino, local
+            FROM edumanager.periodos_arquivados
+            ORDER BY ano_letivo
+        """)).fetchall()
+
+        colunas = [c for c in _COLUNAS_REGISTRO if c != "grupo"] + ["ano_letivo"]
+        frames = []
+        for periodo in periodos:
+            if periodo.destino == "frio":
+                result = conn.execute(text(
+                    f"SELECT {', '.join(colunas)} FROM edumanager.{periodo.local}"
+                ))
+                frames.append(pd.DataFrame(result.fetchall(), columns=result.keys()))
+            else:
+                frames.append(_ler_parquet(periodo.local, colunas))
+
+    if not frames:
+        return pd.DataFrame(columns=_COLUNAS_REGISTRO)
+
+    df = pd.concat(frames, ignore_index=True)
+    for key, value in (filters or {}).items():
+        if key == "prazo_dias":
+            limite = date.today() + timedelta(days=int(value))
+            df = df[df["data_limite_da_entrega"].notna() & (df["data_limite_da_entrega"] <= limite)]
+        elif key in df.columns:
+            df = df[df[key] == value]
+
+    return df.reindex(columns=_COLUNAS_REGISTRO)
+
+def _ler_parquet(caminho: str, colunas: list[str]) -> pd.DataFrame:
+    origem = caminho.replace("'", "''")
+    con = db.connect()
+    try:
+        df = con.execute(
+            f"SELECT {', '.join(colunas)} FROM read_parquet('{origem}')"
+        ).df()
+    finally:
+        con.close()
+
+    # DuckDB devolve DATE como datetime64 (ou outro tipo, se a coluna estiver
+    # toda vazia em arquivos antigos); mantém date como o restante do app
+    for coluna in df.columns:
+        if coluna.startswith("data_"):
+            df[coluna] = pd.to_datetime(df[coluna], errors="coerce").dt.date
+    return df
+
+# ======================================================
+# Alertas pré-calculados
+# ======================================================
+
+# Maior antecedência selecionável na UI; a tabela guarda tudo dentro dela
+ALERTAS_JANELA_DIAS = int(os.getenv("ALERTAS_JANELA_DIAS", 30))
+# Chave do advisory lock: só um processo recalcula por vez
+_ALERTAS_LOCK = 72_031_032
+
+def create_alertas_tables():
+    sql = """
+    ALTER TABLE edumanager.controle_materia
+        ADD COLUMN IF NOT EXISTS atualizado_em TIMESTAMPTZ NOT NULL DEFAULT now();
+
+    CREATE INDEX IF NOT EXISTS idx_controle_materia_atualizado_em
+        ON edumanager.controle_materia (atualizado_em);
+
+    CREATE OR REPLACE FUNCTION edumanager.marcar_atualizado_em() RETURNS trigger AS $$
+    BEGIN
+        NEW.atualizado_em := now();
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE TRIGGER trg_controle_materia_atualizado_em
+        BEFORE UPDATE ON edumanager.controle_materia
+        FOR EACH ROW EXECUTE FUNCTION edumanager.marcar_atualizado_em();
+
+    CREATE TABLE IF NOT EXISTS edumanager.alertas (
+        registro_id BIGINT PRIMARY KEY,
+        professor_titular VARCHAR,
+        turma VARCHAR,
+        materia VARCHAR,
+        capitulo VARCHAR,
+        data_limite_da_entrega DATE NOT NULL,
+        calculado_em TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_alertas_professor
+        ON edumanager.alertas (professor_titular, data_limite_da_entrega);
+    CREATE INDEX IF NOT EXISTS idx_alertas_turma
+        ON edumanager.alertas (turma, data_limite_da_entrega);
+
+    CREATE TABLE IF NOT EXISTS edumanager.alertas_outbox (
+        id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+        registro_id BIGINT NOT NULL,
+        professor_titular VARCHAR,
+        turma VARCHAR,
+        tipo VARCHAR NOT NULL,
+        payload JSONB,
+        criado_em TIMESTAMPTZ NOT NULL DEFAULT now(),
+        enviado_em TIMESTAMPTZ
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_alertas_outbox_pendentes
+        ON edumanager.alertas_outbox (id) WHERE enviado_em IS NULL;
+    """
+    with engine.begin() as conn:
+        conn.execute(text(sql))
+
+    LOGGER.info("Tabelas de alertas verificadas/criadas.")
+
+def recalcular_alertas(desde: datetime | None = None) -> dict | None:
+    """
+    Atualiza edumanager.alertas para os registros alterados depois de `desde`
+    (todos, se None) e enfileira no outbox os alertas novos ('novo') ou alterados
+    ('prazo_alterado' se mudou o prazo, 'dados_alterados' se só professor,
+    turma, matéria ou capítulo).
+    Retorna None se outro processo já estiver recalculando.
+    """
+    filtro = "a.atualizado_em > :desde" if desde is not None else "TRUE"
+
+    sql = text(f"""
+        WITH candidatos AS (
+            SELECT
+                a.id
+                ,a.professor_titular
+                ,a.turma
+                ,a.materia
+                ,a.capitulo
+                ,COALESCE(bl.data_limite_da_entrega, a.data_limite_da_entrega) AS data_limite
+                ,a.data_de_aprovacao_final IS NULL
+                    AND COALESCE(a.status, '') NOT IN ('Concluído', 'Concluido') AS pendente
+            FROM edumanager.controle_materia a
+            LEFT JOIN edumanager.bloco_grupo_relation bgr ON bgr.id = a.id
+            LEFT JOIN edumanager.bloco bl ON bl.bloco = a.bloco AND bl.grupo = bgr.grupo
+            WHERE {filtro}
+        ),
+        em_alerta AS (
+            SELECT * FROM candidatos
+            WHERE pendente
+              AND data_limite IS NOT NULL
+              AND data_limite <= current_date + :janela
+        ),
+        -- Prazo gravado antes desta execução (as CTEs leem o mesmo snapshot)
+        anteriores AS (
+            SELECT al.registro_id, al.data_limite_da_entrega
+            FROM edumanager.alertas al
+            JOIN em_alerta e ON e.id = al.registro_id
+        ),
+        removidos AS (
+            DELETE FROM edumanager.alertas al
+            USING candidatos c
+            WHERE al.registro_id = c.id
+              AND NOT EXISTS (SELECT 1 FROM em_alerta e WHERE e.id = c.id)
+            RETURNING al.registro_id
+        ),
+        gravados AS (
+            INSERT INTO edumanager.alertas AS al (
+                registro_id, professor_titular, turma, materia, capitulo,
+                data_limite_da_entrega
+            )
+            SELECT id, professor_titular, turma, materia, capitulo, data_limite
+            FROM em_alerta
+            ON CONFLICT (registro_id) DO UPDATE SET
+                professor_titular = EXCLUDED.professor_titular,
+                turma = EXCLUDED.turma,
+                materia = EXCLUDED.materia,
+                capitulo = EXCLUDED.capitulo,
+                data_limite_da_entrega = EXCLUDED.data_limite_da_entrega,
+                calculado_em = now()
+            WHERE (al.professor_titular, al.turma, al.materia, al.capitulo, al.data_limite_da_entrega)
+                IS DISTINCT FROM
+                (EXCLUDED.professor_titular, EXCLUDED.turma, EXCLUDED.materia,
+                 EXCLUDED.capitulo, EXCLUDED.data_limite_da_entrega)
+            RETURNING al.registro_id, al.professor_titular, al.turma,
+                al.data_limite_da_entrega, (al.xmax = 0) AS novo
+        ),
+        enfileirados AS (
+            INSERT INTO edumanager.alertas_outbox (
+                registro_id, professor_titular, turma, tipo, payload
+            )
+            SELECT
+                g.registro_id, g.professor_titular, g.turma,
+                CASE
+                    WHEN g.novo THEN 'novo'
+                    WHEN g.data_limite_da_entrega IS DISTINCT FROM ant.data_limite_da_entrega
+                        THEN 'prazo_alterado'
+                    ELSE 'dados_alterados'
+                END,
+                jsonb_build_object('data_limite_da_entrega', g.data_limite_da_entrega)
+            FROM gravados g
+            LEFT JOIN anteriores ant ON ant.registro_id = g.registro_id
+            RETURNING 1
+        )
+        SELECT
+            now() AS calculado_em
+            ,(SELECT count(*) FROM gravados) AS gravados
+            ,(SELECT count(*) FROM removidos) AS removidos
+            ,(SELECT count(*) FROM enfileirados) AS enfileirados
+    """)
+
+    with engine.begin() as conn:
+        livre = conn.execute(
+            text("SELECT pg_try_advisory_xact_lock(:chave)"),
+            {"chave": _ALERTAS_LOCK}
+        ).scalar()
+        if not livre:
+            return None
+
+        resultado = conn.execute(
+            sql, {"desde": desde, "janela": ALERTAS_JANELA_DIAS}
+        ).one()._asdict()
+
+        # Registros excluídos não aparecem como candidatos
+        resultado["removidos"] += conn.execute(text("""
+            DELETE FROM edumanager.alertas al
+            WHERE NOT EXISTS (
+                SELECT 1 FROM edumanager.controle_materia a WHERE a.id = al.registro_id
+            )
+        """)).rowcount
+
+    LOGGER.info(
+        "Alertas recalculados.",
+        extra={"completo": desde is None, **{k: v for k, v in resultado.items() if k != "calculado_em"}}
+    )
+    return resultado
+
+def listar_alertas(
+    dias: int = ALERTAS_JANELA_DIAS,
+    professor: str | None = None,
+    turma: str | None = None,
+    primary: bool = False,
+) -> pd.DataFrame:
+    """Alertas pré-calculados com prazo em até `dias` dias (inclui atrasados)."""
+    sql = """
+        SELECT registro_id, professor_titular, turma, materia, capitulo,
+               data_limite_da_entrega,
+               data_limite_da_entrega - current_date AS dias_restantes
+        FROM edumanager.alertas
+        WHERE data_limite_da_entrega <= current_date + :dias
+    """
+    params = {"dias": dias}
+
+    if professor is not None:
+        sql += " AND professor_titular = :professor"
+        params["professor"] = professor
+    if turma is not None:
+        sql += " AND turma = :turma"
+        params["turma"] = turma
+
+    with get_read_engine(primary).connect() as conn:
+        result = conn.execute(text(sql + " ORDER BY data_limite_da_entrega"), params)
+        return pd.DataFrame(result.fetchall(), columns=result.keys())
+
+def listar_outbox_pendente(limite: int = 100) -> pd.DataFrame:
+    sql = text("""
+        SELECT id, registro_id, professor_titular, turma, tipo, payload, criado_em
+        FROM edumanager.alertas_outbox
+        WHERE enviado_em IS NULL
+        ORDER BY id
+        LIMIT :limite
+    """)
+    with engine.connect() as conn:
+        result = conn.execute(sql, {"limite": limite})
+        return pd.DataFrame(result.fetchall(), columns=result.keys())
+
+def marcar_outbox_enviado(ids: list[int]):
+    if not ids:
+        return
+
+    sql = text("""
+        UPDATE edumanager.alertas_outbox
+        SET enviado_em = now()
+        WHERE id = ANY(:ids)
+    """)
+    with engine.begin() as conn:
+        conn.execute(sql, {"ids": list(ids)})
+
+# ======================================================
+# Versão do schema
+# ======================================================
+
+# Incrementar sempre que o DDL acima mudar
+SCHEMA_VERSION = 1
+_SCHEMA_LOCK = 72_031_029
+
+def _versao_schema(conn) -> int:
+    existe = conn.execute(
+        text("SELECT to_regclass('edumanager.schema_versao') IS NOT NULL")
+    ).scalar()
+    if not existe:
+        return 0
+    return conn.execute(
+        text("SELECT COALESCE(MAX(versao), 0) FROM edumanager.schema_versao")
+    ).scalar()
+
+def garantir_schema():
+    """
+    Cria/migra as tabelas só se a versão gravada no banco for menor que
+    SCHEMA_VERSION. O DDL pega locks fortes em controle_materia, por isso é
+    chamado uma vez por processo (e pelo supervisor antes de subir os workers),
+    nunca por sessão. Um advisory lock evita que vários processos migrem juntos.
+    """
+    # Commits de DDL não abrem a janela de read-your-writes de ninguém
+    token = _sessao_leitura.set(None)
+    try:
+        _garantir_schema()
+    finally:
+        _sessao_leitura.reset(token)
+
+def _garantir_schema():
+    with engine.connect() as conn:
+        if _versao_schema(conn) >= SCHEMA_VERSION:
+            garantir_particoes()
+            return
+
+        conn.execute(text("SELECT pg_advisory_lock(:chave)"), {"chave": _SCHEMA_LOCK})
+        try:
+            conn.commit()
+            if _versao_schema(conn) < SCHEMA_VERSION:
+                create_table()
+                create_professores_table()
+                create_dimensoes()
+                create_search_index()
+                create_arquivo_table()
+                create_alertas_tables()
+
+                conn.execute(text("""
+                    CREATE TABLE IF NOT EXISTS edumanager.schema_versao (
+                        versao INTEGER PRIMARY KEY,
+                        aplicado_em TIMESTAMPTZ NOT NULL DEFAULT now()
+                    );
+                    INSERT INTO edumanager.schema_versao (versao) VALUES (:versao)
+                    ON CONFLICT (versao) DO NOTHING;
+                """), {"versao": SCHEMA_VERSION})
+                conn.commit()
+                LOGGER.info("Schema atualizado.", extra={"versao": SCHEMA_VERSION})
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:chave)"), {"chave": _SCHEMA_LOCK})
+            conn.commit()
+
 # ======================================================
 # CRUD
 # ======================================================
 
-def fetch_all(filters: dict | None = None) -> pd.DataFrame:
+def fetch_all(
+    filters: dict | None = None,
+    primary: bool = False,
+    incluir_historico: bool = False,
+) -> pd.DataFrame:
+    """
+    Registros dos períodos ativos (partições anexadas). Com incluir_historico,
+    acrescenta os períodos arquivados por arquivar_periodo.
+    """
     base_sql = """
         SELECT 
             a.id
-            ,a.turma                   
-            ,a.materia                 
-            ,a.professor_titular       
+            ,t.nome as turma
+            ,m.nome as materia
+            ,p.nome as professor_titular
             ,a.trimestre               
             ,a.capitulo                
             ,a.bloco, bgr.grupo                   
@@ -104,6 +1016,9 @@ def fetch_all(filters: dict | None = None) -> pd.DataFrame:
             ,a.data_de_aprovacao_final 
             ,a.obs 
             FROM edumanager.controle_materia a
+            left join edumanager.turmas t on t.id = a.turma_id
+            left join edumanager.materias m on m.id = a.materia_id
+            left join edumanager.professores p on p.id = a.professor_id
             left join edumanager.bloco_grupo_relation bgr on a.id = bgr.id
             left join (select a.bloco, a.data_limite_da_entrega, a.grupo
             ,case 
@@ -123,22 +1038,161 @@ def fetch_all(filters: dict | None = None) -> pd.DataFrame:
             end as status
             from edumanager.bloco a ) b on a.bloco = b.bloco
             and b.grupo = bgr.grupo
-            ORDER BY a.id
     """
-    params = {}
-
-    if filters:
-        clauses = []
-        for key, value in filters.items():
-            clauses.append(f"{key} = :{key}")
-            params[key] = value
-        base_sql += " WHERE " + " AND ".join(clauses)
+    where, params = montar_filtros(filters)
+    base_sql += where + " ORDER BY a.id"
 
-    with engine.connect() as conn:
+    with get_read_engine(primary).connect() as conn:
         result = conn.execute(text(base_sql), params)
-        return pd.DataFrame(result.fetchall(), columns=result.keys())
+        df = pd.DataFrame(result.fetchall(), columns=result.keys())
+
+    if incluir_historico:
+        historico = fetch_historico(filters)
+        if not historico.empty:
+            df = pd.concat([df, historico[df.columns]], ignore_index=True)
+
+    return df
+
+# Colunas aceitas como filtro (igualdade) nas consultas de controle_materia
+COLUNAS_FILTRO = {
+    "turma", "materia", "professor_titular", "trimestre",
+    "capitulo", "bloco", "ano_letivo",
+    "turma_id", "materia_id", "professor_id",
+}
+
+# Filtros por nome viram filtros pela chave inteira da dimensão
+_FILTROS_DIMENSAO = {
+    "turma": ("turma_id", "turmas"),
+    "materia": ("materia_id", "materias"),
+    "professor_titular": ("professor_id", "professores"),
+}
+
+# Prazo efetivo do registro: o do bloco/grupo quando houver, como em fetch_all.
+# Subconsulta correlacionada para servir também ao UPDATE da edição em massa.
+_PRAZO_EFETIVO_SQL = """COALESCE(
+    (SELECT bl.data_limite_da_entrega
+       FROM edumanager.bloco_grupo_relation bgr
+       JOIN edumanager.bloco bl ON bl.bloco = {alias}.bloco AND bl.grupo = bgr.grupo
+      WHERE bgr.id = {alias}.id
+      LIMIT 1),
+    {alias}.data_limite_da_entrega
+)"""
+
+def montar_filtros(filters: dict | None, alias: str = "a") -> tuple[str, dict]:
+    """
+    WHERE para controle_materia a partir de {coluna: valor} (igualdade).
+    A chave especial "prazo_dias" restringe o prazo efetivo (o do bloco, se
+    houver) em até N dias a partir de hoje (inclui os vencidos).
+    """
+    if not filters:
+        return "", {}
+
+    invalidas = set(filters) - COLUNAS_FILTRO - {"prazo_dias"}
+    if invalidas:
+        raise ValueError(f"Filtros inválidos: {invalidas}")
+
+    clauses = []
+    for key in filters:
+        if key == "prazo_dias":
+            prazo = _PRAZO_EFETIVO_SQL.format(alias=alias)
+            clauses.append(f"{prazo} <= current_date + :prazo_dias")
+        elif key in _FILTROS_DIMENSAO:
+            coluna_id, dimensao = _FILTROS_DIMENSAO[key]
+            clauses.append(
+                f"{alias}.{coluna_id} = "
+                f"(SELECT id FROM edumanager.{dimensao} WHERE nome = :{key})"
+            )
+        else:
+            clauses.append(f"{alias}.{key} = :{key}")
+    return " WHERE " + " AND ".join(clauses), dict(filters)
+
+def contar_registros(filters: dict | None = None, primary: bool = False) -> int:
+    where, params = montar_filtros(filters)
+    sql = text(f"SELECT count(*) FROM edumanager.controle_materia a{where}")
+    with get_read_engine(primary).connect() as conn:
+        return conn.execute(sql, params).scalar()
+
+def buscar_registros(
+    termo: str,
+    pagina: int = 1,
+    por_pagina: int = 50,
+    primary: bool = False,
+) -> tuple[pd.DataFrame, int]:
+    """
+    Busca textual em matéria, capítulo, professor e observações.
+    Combina full-text (palavras, com stemming) e trigramas (trechos de palavra),
+    ordena por relevância e devolve a página pedida junto com o total de resultados.
+    O total vale mesmo para uma página além da última (que volta vazia).
+    """
+    termo = termo.strip()
+    if not termo:
+        return pd.DataFrame(), 0
+
+    padrao = termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+    filtro = f"""
+        FROM edumanager.controle_materia a, q
+        WHERE a.busca @@ q.tsq
+           OR {_TEXTO_BUSCA} ILIKE :padrao
+    """
+    cte = "WITH q AS (SELECT websearch_to_tsquery('portuguese', :termo) AS tsq)"
+
+    sql = text(f"""
+        {cte}
+        SELECT
+            a.id
+            ,a.turma
+            ,a.materia
+            ,a.professor_titular
+            ,a.trimestre
+            ,a.capitulo
+            ,a.bloco
+            ,a.status
+            ,a.data_limite_da_entrega
+            ,a.obs
+            ,ts_rank(a.busca, q.tsq) + similarity({_TEXTO_BUSCA}, :termo) AS relevancia
+            ,count(*) OVER () AS total
+        {filtro}
+        ORDER BY relevancia DESC, a.id
+        LIMIT :limite OFFSET :offset
+    """)
+    params = {
+        "termo": termo,
+        "padrao": f"%{padrao}%",
+        "limite": por_pagina,
+        "offset": (max(pagina, 1) - 1) * por_pagina,
+    }
+
+    with get_read_engine(primary).connect() as conn:
+        result = conn.execute(sql, params)
+        df = pd.DataFrame(result.fetchall(), columns=result.keys())
+
+        if not df.empty:
+            total = int(df["total"].iloc[0])
+        elif params["offset"] == 0:
+            total = 0
+        else:
+            # Página além da última: a janela não tem linhas, conta à parte
+            total = conn.execute(
+                text(f"{cte} SELECT count(*) {filtro}"), params
+            ).scalar()
+
+    return df.drop(columns="total"), total
+
+def _com_ano_letivo(data: dict) -> dict:
+    """Define o período letivo (partição) pelo ano do primeiro prazo preenchido."""
+    if data.get("ano_letivo") is not None:
+        return data
+
+    for campo in ("data_limite_da_entrega", "data_da_entrega", "data_de_aprovacao_final"):
+        valor = data.get(campo)
+        if valor is not None and not pd.isna(valor):
+            return {**data, "ano_letivo": pd.Timestamp(valor).year}
+
+    return {**data, "ano_letivo": date.today().year}
 
 def insert_record(data: dict):
+    data = _com_ano_letivo(data)
     keys = ", ".join(data.keys())
     values = ", ".join([f":{k}" for k in data.keys()])
 
@@ -160,6 +1214,39 @@ def insert_record(data: dict):
         session.close()
 
 
+IMPORT_CHUNK_SIZE = 1000
+
+def insert_records(rows: list[dict]) -> int:
+    """
+    Insere vários registros numa única transação, com INSERT de múltiplos
+    VALUES em lotes de IMPORT_CHUNK_SIZE (uma ida ao banco por lote).
+    """
+    if not rows:
+        return 0
+
+    rows = [_com_ano_letivo(row) for row in rows]
+    tabela = table(
+        "controle_materia",
+        *[column(c) for c in rows[0]],
+        schema="edumanager",
+    )
+
+    session = get_session()
+    try:
+        for inicio in range(0, len(rows), IMPORT_CHUNK_SIZE):
+            lote = rows[inicio:inicio + IMPORT_CHUNK_SIZE]
+            session.execute(insert(tabela).values(lote))
+        session.commit()
+        LOGGER.info("Registros inseridos.", extra={"linhas": len(rows)})
+        return len(rows)
+    except Exception:
+        session.rollback()
+        LOGGER.exception("Erro ao inserir registros.")
+        raise
+    finally:
+        session.close()
+
+
 def insert_bloco(data: dict):
     session = get_session()
 
@@ -241,7 +1328,7 @@ def update_status(record_id: int, status: str):
     try:
         session.execute(sql, {"status": status, "id": record_id})
         session.commit()
-        LOGGER.info(f"Status atualizado para ID {record_id}.")
+        LOGGER.info("Status atualizado.", extra={"record_id": record_id})
     except Exception:
         session.rollback()
         LOGGER.exception("Erro ao atualizar status.")
@@ -259,7 +1346,7 @@ def update_bloco_grupo_relation (record_id: int, bloco: str ,grupo: str):
     try:
         session.execute(sql, {"bloco": bloco, "grupo":grupo, "id": record_id})
         session.commit()
-        LOGGER.info(f"Status atualizado para ID {record_id}.")
+        LOGGER.info("Status atualizado.", extra={"record_id": record_id})
     except Exception:
         session.rollback()
         LOGGER.exception("Erro ao atualizar status.")
@@ -276,7 +1363,7 @@ def delete_record(record_id: int):
     try:
         session.execute(sql, {"id": record_id})
         session.commit()
-        LOGGER.info(f"Registro removido: ID {record_id}.")
+        LOGGER.info("Registro removido.", extra={"record_id": record_id})
     except Exception:
         session.rollback()
         LOGGER.exception("Erro ao deletar registro.")
@@ -297,12 +1384,21 @@ def inserir_professor(nome: str):
     finally:
         session.close()
 
-def listar_professores() -> pd.DataFrame:
-    sql = "select distinct professor_titular as nome from 	edumanager.controle_materia"
-    with engine.connect() as conn:
+def _listar_dimensao(tabela: str, primary: bool) -> pd.DataFrame:
+    sql = f"SELECT id, nome FROM edumanager.{tabela} ORDER BY nome"
+    with get_read_engine(primary).connect() as conn:
         result = conn.execute(text(sql))
         return pd.DataFrame(result.fetchall(), columns=result.keys())
 
+def listar_professores(primary: bool = False) -> pd.DataFrame:
+    return _listar_dimensao("professores", primary)
+
+def listar_turmas(primary: bool = False) -> pd.DataFrame:
+    return _listar_dimensao("turmas", primary)
+
+def listar_materias(primary: bool = False) -> pd.DataFrame:
+    return _listar_dimensao("materias", primary)
+
 def login_user(email: str, password: str) -> str | None:
     sql = text("""
         SELECT status
@@ -1,13 +1,201 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
 
-LOG_FILE = "app.log"
+LOG_FILE = os.getenv("LOG_FILE", "app.log")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
-def setup_logger():
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
-        handlers=[
-            logging.FileHandler(LOG_FILE, encoding="utf-8"),
-            logging.StreamHandler()
-        ]
+# "size" (padrão) rotaciona por tamanho; "time" rotaciona à meia-noite
+LOG_ROTATION = os.getenv("LOG_ROTATION", "size")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 7))
+
+# ======================================================
+# Contexto da requisição / rerun
+# ======================================================
+
+_request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+_rerun_id: ContextVar[str | None] = ContextVar("rerun_id", default=None)
+
+# Atributos padrão do LogRecord — o que sobrar veio de `extra=`
+_ATRIBUTOS_PADRAO = set(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__
+) | {"message", "asctime", "taskName"}
+
+
+def novo_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def set_log_context(request_id: str | None = None, rerun_id: str | None = None):
+    """
+    Define os ids que serão anexados a todos os logs da thread atual.
+    request_id identifica a sessão do usuário; rerun_id, cada execução do script.
+    """
+    if request_id is not None:
+        _request_id.set(request_id)
+    if rerun_id is not None:
+        _rerun_id.set(rerun_id)
+
+
+def get_log_context() -> dict:
+    return {"request_id": _request_id.get(), "rerun_id": _rerun_id.get()}
+
+
+class ContextFilter(logging.Filter):
+    """Copia os ids do contexto para o registro na thread que gerou o log."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = _request_id.get()
+        if getattr(record, "rerun_id", None) is None:
+            record.rerun_id = _rerun_id.get()
+        return True
+
+
+# ======================================================
+# Formatação
+# ======================================================
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro, pronta para análise de latência."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _ATRIBUTOS_PADRAO and value is not None:
+                payload[key] = value
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Mantém a mensagem crua e o traceback separados ao enfileirar,
+    para que o JsonFormatter do listener monte os campos corretamente.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+def _file_handler() -> logging.Handler:
+    if LOG_ROTATION == "time":
+        return logging.handlers.TimedRotatingFileHandler(
+            LOG_FILE,
+            when="midnight",
+            backupCount=LOG_BACKUP_COUNT,
+            encoding="utf-8",
+        )
+    return logging.handlers.RotatingFileHandler(
+        LOG_FILE,
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding="utf-8",
     )
+
+
+# ======================================================
+# Setup
+# ======================================================
+
+_listener: logging.handlers.QueueListener | None = None
+_lock = threading.Lock()
+
+
+def setup_logger():
+    """
+    Configura o logging assíncrono: os chamadores só enfileiram o registro
+    e uma thread (QueueListener) faz a escrita em disco e no console.
+    Pode ser chamada a cada rerun do Streamlit — só configura uma vez por processo.
+    """
+    global _listener
+
+    with _lock:
+        if _listener is not None:
+            return
+
+        file_handler = _file_handler()
+        file_handler.setFormatter(JsonFormatter())
+
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(
+            "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+        ))
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = _QueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+
+        root = logging.getLogger()
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(queue_handler)
+
+        _listener = logging.handlers.QueueListener(
+            log_queue,
+            file_handler,
+            stream_handler,
+            respect_handler_level=True,
+        )
+        _listener.start()
+        atexit.register(shutdown_logger)
+
+
+def shutdown_logger():
+    """Esvazia a fila e para o listener."""
+    global _listener
+
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        _listener = None
+
+
+@contextmanager
+def log_duration(logger: logging.Logger, evento: str, **campos):
+    """
+    Mede o bloco e registra `evento` com `duration_ms` e os campos extras.
+    Se o bloco falhar, o registro sai como WARNING com `erro` (tipo da exceção).
+
+        with log_duration(LOGGER, "fetch_all"):
+            df = fetch_all()
+    """
+    inicio = time.perf_counter()
+    nivel = logging.INFO
+    try:
+        yield
+    except Exception as e:
+        # st.rerun()/st.stop() não derivam de Exception e não contam como erro
+        nivel = logging.WARNING
+        campos["erro"] = type(e).__name__
+        raise
+    finally:
+        campos["duration_ms"] = round((time.perf_counter() - inicio) * 1000, 2)
+        logger.log(nivel, evento, extra={"evento": evento, **campos})
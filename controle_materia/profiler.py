@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import time
+import cProfile
+import logging
+import pstats
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+LOGGER = logging.getLogger("profiler")
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "profiles"))
+# Intervalo do modo por amostragem (segundos)
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", 0.005))
+
+MODOS = ("deterministico", "amostragem")
+
+# cProfile e tracemalloc são globais ao processo: um perfil por vez
+_lock = threading.Lock()
+
+
+class _Amostrador(threading.Thread):
+    """
+    Amostra periodicamente a pilha das threads alvo e conta as pilhas no formato
+    "collapsed" (func;func;func N), lido por flamegraph.pl e speedscope.
+    Threads do carregar_pagina entram e saem via perfil_tarefa.
+    """
+
+    def __init__(self, thread_id: int, intervalo: float):
+        super().__init__(name="profiler-amostrador", daemon=True)
+        self.thread_ids = {thread_id}
+        self.intervalo = intervalo
+        self.pilhas: Counter[str] = Counter()
+        self._ids_lock = threading.Lock()
+        self._parar = threading.Event()
+
+    def adicionar(self, thread_id: int):
+        with self._ids_lock:
+            self.thread_ids.add(thread_id)
+
+    def remover(self, thread_id: int):
+        with self._ids_lock:
+            self.thread_ids.discard(thread_id)
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            with self._ids_lock:
+                alvos = list(self.thread_ids)
+            frames = sys._current_frames()
+            for thread_id in alvos:
+                frame = frames.get(thread_id)
+                pilha = []
+                while frame is not None:
+                    code = frame.f_code
+                    pilha.append(
+                        f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                if pilha:
+                    self.pilhas[";".join(reversed(pilha))] += 1
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+
+class _Coleta:
+    """Perfis das tarefas em outras threads, somados ao do rerun no final."""
+
+    def __init__(self, amostrador: _Amostrador | None):
+        self.amostrador = amostrador
+        self.perfis: list[cProfile.Profile] = []
+        self.fechada = False
+        self._lock = threading.Lock()
+
+    def adicionar(self, perfil: cProfile.Profile):
+        with self._lock:
+            if not self.fechada:
+                self.perfis.append(perfil)
+
+    def fechar(self) -> list[cProfile.Profile]:
+        with self._lock:
+            self.fechada = True
+            return list(self.perfis)
+
+
+# Perfil do rerun em andamento; as tarefas de carregar_pagina herdam pelo contexto
+_coleta: ContextVar[_Coleta | None] = ContextVar("coleta_perfil", default=None)
+
+
+@contextmanager
+def perfil_tarefa():
+    """
+    Inclui o bloco, rodando em outra thread, no perfil do rerun que o disparou
+    (se houver). O app o registra no carregar_pagina com set_envoltorio_tarefa.
+    """
+    coleta = _coleta.get()
+    if coleta is None:
+        yield
+        return
+
+    thread_id = threading.get_ident()
+    if coleta.amostrador is not None:
+        coleta.amostrador.adicionar(thread_id)
+        try:
+            yield
+        finally:
+            coleta.amostrador.remover(thread_id)
+        return
+
+    perfil = cProfile.Profile()
+    try:
+        perfil.enable()
+    except ValueError:
+        # Python 3.12+: só um cProfile ativo por processo; a tarefa fica de fora
+        perfil = None
+
+    try:
+        yield
+    finally:
+        if perfil is not None:
+            perfil.disable()
+            coleta.adicionar(perfil)
+
+
+@contextmanager
+def perfil_rerun(rerun_id: str, modo: str = "deterministico", diretorio: Path = PROFILE_DIR):
+    """
+    Perfila o bloco (um rerun do Streamlit) e grava em `diretorio`:
+
+    - <rerun_id>.prof e <rerun_id>.txt (modo deterministico, cProfile), ou
+      <rerun_id>.folded (modo amostragem, pilhas para flamegraph);
+    - <rerun_id>.mem.txt com o pico de memória e as linhas que mais alocaram;
+    - <rerun_id>.json com o resumo.
+
+    As consultas disparadas por carregar_pagina rodam em threads do executor
+    e entram no perfil via perfil_tarefa. No modo deterministico com Python
+    3.12+ o cProfile não pode ser ativado de novo nessas threads e elas ficam
+    de fora; o modo amostragem cobre as duas versões.
+
+    O tracemalloc enxerga o processo todo, então alocações de outras sessões
+    simultâneas entram no pico. Se já houver um perfil em andamento, o bloco
+    roda sem perfil.
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo de profiling inválido: {modo}")
+
+    if not _lock.acquire(blocking=False):
+        LOGGER.warning("Profiling já em andamento; rerun não perfilado.")
+        yield
+        return
+
+    perfil = amostrador = None
+    ja_rastreando = tracemalloc.is_tracing()
+    if not ja_rastreando:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+
+    if modo == "deterministico":
+        perfil = cProfile.Profile()
+    else:
+        amostrador = _Amostrador(threading.get_ident(), PROFILE_SAMPLE_INTERVAL)
+
+    coleta = _Coleta(amostrador)
+    token = _coleta.set(coleta)
+
+    inicio = time.perf_counter()
+    try:
+        if perfil is not None:
+            perfil.enable()
+        else:
+            amostrador.start()
+
+        # st.rerun()/st.stop() saem por exceção; o finally grava mesmo assim
+        yield
+    finally:
+        if perfil is not None:
+            perfil.disable()
+        else:
+            amostrador.parar()
+        _coleta.reset(token)
+        tarefas = coleta.fechar()
+
+        duracao_ms = round((time.perf_counter() - inicio) * 1000, 2)
+        _, pico = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if not ja_rastreando:
+            tracemalloc.stop()
+
+        try:
+            arquivos = _gravar(
+                diretorio, rerun_id, perfil, tarefas, amostrador, snapshot, duracao_ms, pico
+            )
+            LOGGER.info(
+                "Perfil gravado.",
+                extra={
+                    "modo": modo,
+                    "duration_ms": duracao_ms,
+                    "pico_memoria_bytes": pico,
+                    "tarefas_perfiladas": len(tarefas),
+                    "arquivos": arquivos,
+                }
+            )
+        except Exception:
+            LOGGER.exception("Erro ao gravar perfil.")
+        finally:
+            _lock.release()
+
+
+def _gravar(diretorio, rerun_id, perfil, tarefas, amostrador, snapshot, duracao_ms, pico) -> list[str]:
+    diretorio = Path(diretorio)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    base = diretorio / rerun_id
+    arquivos = []
+
+    if perfil is not None:
+        stats = pstats.Stats(perfil)
+        for tarefa in tarefas:
+            stats.add(tarefa)
+        stats.dump_stats(f"{base}.prof")
+        with open(f"{base}.txt", "w", encoding="utf-8") as f:
+            stats.stream = f
+            stats.sort_stats("cumulative").print_stats(50)
+        arquivos += [f"{base}.prof", f"{base}.txt"]
+    else:
+        with open(f"{base}.folded", "w", encoding="utf-8") as f:
+            for pilha, n in amostrador.pilhas.most_common():
+                f.write(f"{pilha} {n}\n")
+        arquivos.append(f"{base}.folded")
+
+    with open(f"{base}.mem.txt", "w", encoding="utf-8") as f:
+        f.write(f"pico: {pico / 1024 / 1024:.2f} MiB\n\n")
+        for stat in snapshot.statistics("lineno")[:30]:
+            f.write(f"{stat}\n")
+    arquivos.append(f"{base}.mem.txt")
+
+    resumo = {
+        "rerun_id": rerun_id,
+        "duration_ms": duracao_ms,
+        "pico_memoria_bytes": pico,
+        "arquivos": arquivos,
+    }
+    with open(f"{base}.json", "w", encoding="utf-8") as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2)
+
+    return arquivos
@@ -1,29 +1,382 @@
+import argparse
+import logging
+import os
+import signal
+import socket
+import socketserver
 import subprocess
+import threading
+import urllib.request
 import webbrowser
 import time
 import sys
 from pathlib import Path
 
-def main():
-    base_dir = Path(__file__).parent
+from logger_config import setup_logger
 
-    app_path = base_dir / "app.py"
+LOGGER = logging.getLogger("run_app")
 
-    # Inicia Streamlit
-    subprocess.Popen([
+BASE_DIR = Path(__file__).parent
+APP_PATH = BASE_DIR / "app.py"
+
+DEFAULT_PORT = 8501
+HEALTH_PATH = "/_stcore/health"
+
+# Orçamento total de conexões que o servidor PostgreSQL aceita para o app.
+# O padrão equivale ao que um único processo já abria (pool_size 5 + overflow 10).
+DB_POOL_BUDGET = int(os.getenv("DB_POOL_BUDGET", 15))
+
+
+def streamlit_cmd(port: int) -> list[str]:
+    return [
         sys.executable,
         "-m",
         "streamlit",
         "run",
-        str(app_path),
-        "--server.headless=true"
-    ])
+        str(APP_PATH),
+        "--server.headless=true",
+        f"--server.port={port}",
+    ]
+
+
+def log_file_worker(port: int) -> str:
+    """app.log -> app-8502.log: cada worker rotaciona o próprio arquivo."""
+    base = Path(os.getenv("LOG_FILE", "app.log"))
+    return str(base.with_name(f"{base.stem}-{port}{base.suffix}"))
+
+
+def dividir_orcamento_pool(workers: int, budget: int) -> tuple[int, int]:
+    """
+    Divide o orçamento de conexões entre os workers, mantendo a proporção
+    1:2 entre pool_size e max_overflow, de modo que
+    workers * (pool_size + max_overflow) <= budget.
+    """
+    por_worker = budget // workers
+    if por_worker < 1:
+        raise ValueError(
+            f"Orçamento de {budget} conexões insuficiente para {workers} workers"
+        )
+
+    pool_size = max(1, por_worker // 3)
+    max_overflow = por_worker - pool_size
+    return pool_size, max_overflow
+
+
+# ======================================================
+# Workers
+# ======================================================
+
+class Worker:
+    def __init__(self, port: int, env: dict):
+        self.port = port
+        self.env = env
+        self.proc: subprocess.Popen | None = None
+        self.iniciado_em = 0.0
+        self.falhas = 0
+
+    def iniciar(self):
+        self.proc = subprocess.Popen(streamlit_cmd(self.port), env=self.env)
+        self.iniciado_em = time.monotonic()
+        self.falhas = 0
+
+    def vivo(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def saudavel(self, timeout: float = 2.0) -> bool:
+        url = f"http://127.0.0.1:{self.port}{HEALTH_PATH}"
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as resp:
+                return resp.status == 200
+        except OSError:
+            return False
+
+    def parar(self, timeout: float = 10.0):
+        if not self.vivo():
+            return
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+
+class Supervisor:
+    """
+    Sobe N workers Streamlit em portas consecutivas, verifica a saúde de cada
+    um periodicamente e reinicia os que morrerem ou pararem de responder.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        base_port: int,
+        db_budget: int = DB_POOL_BUDGET,
+        intervalo: float = 5.0,
+        falhas_max: int = 3,
+        tolerancia_inicio: float = 30.0,
+    ):
+        pool_size, max_overflow = dividir_orcamento_pool(workers, db_budget)
+
+        env = os.environ.copy()
+        env["DB_POOL_SIZE"] = str(pool_size)
+        env["DB_MAX_OVERFLOW"] = str(max_overflow)
+
+        self.workers = [
+            Worker(base_port + i, {**env, "LOG_FILE": log_file_worker(base_port + i)})
+            for i in range(workers)
+        ]
+        self.intervalo = intervalo
+        self.falhas_max = falhas_max
+        self.tolerancia_inicio = tolerancia_inicio
+
+        self._saudaveis: list[int] = []
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+
+        LOGGER.info(
+            "Supervisor configurado.",
+            extra={
+                "workers": workers,
+                "pool_size": pool_size,
+                "max_overflow": max_overflow,
+                "db_budget": db_budget,
+            }
+        )
+
+    @property
+    def portas(self) -> list[int]:
+        return [w.port for w in self.workers]
+
+    def portas_saudaveis(self) -> list[int]:
+        with self._lock:
+            return list(self._saudaveis)
+
+    def porta_para(self, cliente: str) -> int | None:
+        """
+        Worker do cliente: escolhido sobre a lista fixa de portas, para que a
+        queda ou o reinício de um worker não remapeie os clientes dos outros.
+        Só se o worker do cliente estiver fora do ar usa o próximo saudável.
+        """
+        saudaveis = set(self.portas_saudaveis())
+        portas = self.portas
+        inicio = hash(cliente) % len(portas)
+        for i in range(len(portas)):
+            porta = portas[(inicio + i) % len(portas)]
+            if porta in saudaveis:
+                return porta
+        return None
+
+    def _verificar(self, worker: Worker) -> bool:
+        if not worker.vivo():
+            LOGGER.warning("Worker encerrou, reiniciando.", extra={"porta": worker.port})
+            worker.iniciar()
+            return False
+
+        if worker.saudavel():
+            worker.falhas = 0
+            return True
+
+        # Dá tempo para o Streamlit subir antes de contar falhas
+        if time.monotonic() - worker.iniciado_em < self.tolerancia_inicio:
+            return False
+
+        worker.falhas += 1
+        if worker.falhas >= self.falhas_max:
+            LOGGER.warning(
+                "Worker sem resposta, reiniciando.",
+                extra={"porta": worker.port, "falhas": worker.falhas}
+            )
+            worker.parar()
+            worker.iniciar()
+        return False
+
+    def executar(self):
+        for worker in self.workers:
+            worker.iniciar()
+
+        try:
+            while not self._parar.is_set():
+                saudaveis = [w.port for w in self.workers if self._verificar(w)]
+                with self._lock:
+                    self._saudaveis = saudaveis
+                self._parar.wait(self.intervalo)
+        finally:
+            self.parar_workers()
+
+    def parar(self):
+        self._parar.set()
+
+    def parar_workers(self):
+        for worker in self.workers:
+            worker.parar()
+
+
+# ======================================================
+# Balanceador local
+# ======================================================
+
+class _ProxyHandler(socketserver.BaseRequestHandler):
+    """
+    Encaminha a conexão TCP para um worker saudável. A escolha é fixa por IP
+    do cliente, porque a sessão do Streamlit (websocket e uploads) vive
+    dentro de um único processo.
+    """
+
+    def handle(self):
+        porta = self.server.supervisor.porta_para(self.client_address[0])
+        if porta is None:
+            return
+
+        try:
+            backend = socket.create_connection(("127.0.0.1", porta))
+        except OSError:
+            return
+
+        with backend:
+            t = threading.Thread(
+                target=_copiar, args=(backend, self.request), daemon=True
+            )
+            t.start()
+            _copiar(self.request, backend)
+            t.join()
+
+
+def _copiar(origem: socket.socket, destino: socket.socket):
+    try:
+        while data := origem.recv(65536):
+            destino.sendall(data)
+    except OSError:
+        pass
+    finally:
+        try:
+            destino.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+
+class Balanceador(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int, supervisor: Supervisor):
+        self.supervisor = supervisor
+        super().__init__(("0.0.0.0", port), _ProxyHandler)
+
+
+def gerar_config_nginx(portas: list[int], porta_publica: int) -> str:
+    """Config de nginx equivalente ao balanceador embutido (ip_hash + websocket)."""
+    upstreams = "\n".join(f"    server 127.0.0.1:{p};" for p in portas)
+    return f"""upstream edumanager {{
+    ip_hash;
+{upstreams}
+}}
+
+server {{
+    listen {porta_publica};
+
+    location / {{
+        proxy_pass http://edumanager;
+        proxy_http_version 1.1;
+        proxy_set_header Upgrade $http_upgrade;
+        proxy_set_header Connection "upgrade";
+        proxy_set_header Host $host;
+        proxy_read_timeout 86400;
+    }}
+}}
+"""
+
+
+# ======================================================
+# Entrypoints
+# ======================================================
+
+def run_supervisor(args):
+    setup_logger()
+
+    # Migra o schema uma vez antes de subir os workers, em vez de cada
+    # processo disputar os locks de DDL na primeira sessão
+    from database import engine, garantir_schema
+    garantir_schema()
+    # O supervisor não usa o banco depois disso; as conexões do pool dele
+    # não podem ficar abertas fora do orçamento dividido entre os workers
+    engine.dispose()
+
+    supervisor = Supervisor(args.workers, args.port + 1, args.db_budget)
+
+    if args.nginx_config:
+        Path(args.nginx_config).write_text(
+            gerar_config_nginx(supervisor.portas, args.port), encoding="utf-8"
+        )
+        LOGGER.info("Config do nginx gravada.", extra={"arquivo": args.nginx_config})
+
+    balanceador = None
+    if not args.no_balancer:
+        balanceador = Balanceador(args.port, supervisor)
+        threading.Thread(target=balanceador.serve_forever, daemon=True).start()
+        LOGGER.info("Balanceador iniciado.", extra={"porta": args.port})
+
+    def _encerrar(signum, frame):
+        supervisor.parar()
+
+    signal.signal(signal.SIGINT, _encerrar)
+    signal.signal(signal.SIGTERM, _encerrar)
+
+    if not args.no_browser:
+        threading.Timer(
+            3, webbrowser.open, args=(f"http://localhost:{args.port}",)
+        ).start()
+
+    try:
+        supervisor.executar()
+    finally:
+        if balanceador is not None:
+            balanceador.shutdown()
+            balanceador.server_close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Inicia o EduManager")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Quantidade de processos Streamlit (>1 ativa o modo supervisor)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT,
+        help="Porta pública; no modo supervisor os workers usam as seguintes"
+    )
+    parser.add_argument(
+        "--db-budget", type=int, default=DB_POOL_BUDGET,
+        help="Total de conexões ao banco dividido entre os workers"
+    )
+    parser.add_argument(
+        "--nginx-config",
+        help="Grava um arquivo de config do nginx para os workers"
+    )
+    parser.add_argument(
+        "--no-balancer", action="store_true",
+        help="Não sobe o balanceador embutido (ex.: usando nginx)"
+    )
+    parser.add_argument("--no-browser", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.workers > 1:
+        run_supervisor(args)
+        return
+
+    # Inicia Streamlit
+    subprocess.Popen(streamlit_cmd(args.port))
 
     # Aguarda servidor subir
     time.sleep(3)
 
     # Abre navegador
-    webbrowser.open("http://localhost:8501")
+    if not args.no_browser:
+        webbrowser.open(f"http://localhost:{args.port}")
 
 
 if __name__ == "__main__":
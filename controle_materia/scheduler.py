@@ -0,0 +1,112 @@
+import os
+import logging
+import threading
+from datetime import date, timedelta
+from typing import Callable
+
+import pandas as pd
+
+from database import (
+    recalcular_alertas, listar_outbox_pendente, marcar_outbox_enviado
+)
+
+LOGGER = logging.getLogger("scheduler")
+
+# Intervalo entre recálculos incrementais (segundos)
+ALERTAS_INTERVALO = float(os.getenv("ALERTAS_INTERVALO", 300))
+
+# Sobreposição do watermark, para não perder transações que commitaram
+# depois do recálculo anterior mas com atualizado_em anterior a ele
+_MARGEM = timedelta(minutes=5)
+
+
+class AgendadorAlertas:
+    """
+    Mantém edumanager.alertas atualizada numa thread em segundo plano.
+
+    A cada `intervalo` segundos (ou ao ser notificado de uma escrita) recalcula
+    só os registros alterados desde a última execução. Uma vez por dia, e
+    quando pedido com completo=True, recalcula tudo, já que a janela de prazo
+    anda com a data mesmo sem escritas.
+
+    Se `enviar` for informado, recebe os itens pendentes do outbox após cada
+    recálculo; os que forem processados sem erro são marcados como enviados.
+    """
+
+    def __init__(
+        self,
+        intervalo: float = ALERTAS_INTERVALO,
+        enviar: Callable[[pd.DataFrame], None] | None = None,
+    ):
+        self.intervalo = intervalo
+        self.enviar = enviar
+
+        self._desde = None
+        self._ultimo_completo: date | None = None
+        self._completo_pedido = False
+
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def iniciar(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._parar.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="agendador-alertas", daemon=True
+        )
+        self._thread.start()
+        LOGGER.info("Agendador de alertas iniciado.", extra={"intervalo": self.intervalo})
+
+    def parar(self, timeout: float | None = None):
+        self._parar.set()
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def notificar(self, completo: bool = False):
+        """Pede um recálculo imediato (chamar após escritas)."""
+        if completo:
+            self._completo_pedido = True
+        self._acordar.set()
+
+    def executar_uma_vez(self):
+        completo = (
+            self._desde is None
+            or self._completo_pedido
+            or self._ultimo_completo != date.today()
+        )
+        self._completo_pedido = False
+
+        resultado = recalcular_alertas(None if completo else self._desde)
+        if resultado is None:
+            # Outro processo está recalculando; tenta de novo no próximo ciclo
+            self._completo_pedido = completo
+            return
+
+        self._desde = resultado["calculado_em"] - _MARGEM
+        if completo:
+            self._ultimo_completo = date.today()
+
+        if self.enviar is not None:
+            self._despachar_outbox()
+
+    def _despachar_outbox(self):
+        pendentes = listar_outbox_pendente()
+        if pendentes.empty:
+            return
+
+        self.enviar(pendentes)
+        marcar_outbox_enviado(pendentes["id"].tolist())
+
+    def _loop(self):
+        while not self._parar.is_set():
+            self._acordar.clear()
+            try:
+                self.executar_uma_vez()
+            except Exception:
+                LOGGER.exception("Erro ao recalcular alertas.")
+
+            self._acordar.wait(self.intervalo)
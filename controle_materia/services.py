@@ -1,51 +1,192 @@
 import pandas as pd
 import logging
-from datetime import datetime, timedelta
 from sqlalchemy import text
-from database import get_session
+from database import get_session, montar_filtros, clausula_ano_letivo
 
 LOGGER = logging.getLogger("services")
 
 
+STATUS_VALIDOS = ["Não iniciado", "Em andamento", "Concluído"]
+
+# Esquema da planilha de importação: tipo de cada coluna e se é obrigatória
+ESQUEMA_IMPORTACAO = {
+    "turma": {"tipo": "texto", "obrigatorio": True},
+    "materia": {"tipo": "texto", "obrigatorio": True},
+    "professor_titular": {"tipo": "texto", "obrigatorio": True},
+    "trimestre": {"tipo": "texto", "obrigatorio": True},
+    "capitulo": {"tipo": "texto"},
+    "bloco": {"tipo": "bloco", "obrigatorio": True},
+    "status": {"tipo": "status"},
+    "data_limite_da_entrega": {"tipo": "data"},
+    "data_da_entrega": {"tipo": "data"},
+    "validacao_operacional": {"tipo": "texto"},
+    "revisao_pedagogica": {"tipo": "texto"},
+    "diagramacao": {"tipo": "texto"},
+    "data_de_aprovacao_final": {"tipo": "data"},
+    "obs": {"tipo": "texto"},
+}
+
+
+# Colunas de controle_materia que podem ser atualizadas pelo app
+CAMPOS_EDITAVEIS = set(ESQUEMA_IMPORTACAO)
+
+# Campos liberados na edição em massa (subconjunto de CAMPOS_EDITAVEIS).
+# status fica de fora: para registros em grupo de bloco a tela mostra o status
+# do bloco, então a alteração não apareceria (a grade também o bloqueia).
+CAMPOS_EDICAO_EM_MASSA = [
+    "data_limite_da_entrega",
+    "data_da_entrega",
+    "data_de_aprovacao_final",
+    "validacao_operacional",
+    "revisao_pedagogica",
+    "diagramacao",
+    "obs",
+]
+
+
 def validar_colunas_excel(df: pd.DataFrame):
-    required = {
-        "turma", "materia", "professor_titular", "trimestre",
-        "capitulo", "bloco", "status", "data_limite_da_entrega",
-        "data_da_entrega", "validacao_operacional", "revisao_pedagogica",
-        "diagramacao", "data_de_aprovacao_final", "obs"
-    }
+    required = set(ESQUEMA_IMPORTACAO)
     missing = required - set(df.columns)
     if missing:
         raise ValueError(f"Colunas ausentes no Excel: {missing}")
 
 
-def calcular_alertas(df: pd.DataFrame, dias_alerta: int):
-    hoje = datetime.today().date()
-    limite = hoje + timedelta(days=dias_alerta)
+def _celula_texto(valor):
+    # Coluna numérica com célula vazia vem do Excel como float: 3.0 vira "3"
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return valor
+
+
+def _coagir_texto(serie: pd.Series):
+    valores = serie.map(_celula_texto).astype("string").str.strip()
+    valores = valores.mask(valores == "")
+    return valores, pd.Series(False, index=serie.index)
+
+
+def _coagir_data(serie: pd.Series):
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        datas = serie
+    else:
+        texto, _ = _coagir_texto(serie)
+        # Só dois formatos aceitos: ISO (aaaa-mm-dd) e dd/mm/aaaa; o resto é inválido
+        datas = pd.to_datetime(texto, errors="coerce", format="ISO8601")
+        datas = datas.fillna(
+            pd.to_datetime(texto, errors="coerce", format="%d/%m/%Y")
+        )
+    invalido = serie.notna() & datas.isna()
+    return datas.dt.date, invalido
+
+
+def _coagir_bloco(serie: pd.Series):
+    texto, _ = _coagir_texto(serie)
+    numeros = pd.to_numeric(texto, errors="coerce")
+    invalido = serie.notna() & (numeros.isna() | (numeros % 1 != 0) | (numeros < 1))
+    valores = numeros.where(~invalido).astype("Int64").astype("string")
+    return valores, invalido
+
+
+def _coagir_status(serie: pd.Series):
+    valores, _ = _coagir_texto(serie)
+    invalido = valores.notna() & ~valores.isin(STATUS_VALIDOS)
+    return valores, invalido.fillna(False)
+
+
+_COERCOES = {
+    "texto": (_coagir_texto, ""),
+    "data": (_coagir_data, "data inválida"),
+    "bloco": (_coagir_bloco, "bloco deve ser um número inteiro positivo"),
+    "status": (_coagir_status, f"status deve ser um de {STATUS_VALIDOS}"),
+}
+
+
+def validar_valor(campo: str, valor):
+    """Converte um valor isolado com as mesmas regras da importação."""
+    if campo not in CAMPOS_EDITAVEIS:
+        raise ValueError(f"Campo não editável: {campo}")
+
+    if valor is None:
+        return None
+
+    coagir, mensagem = _COERCOES[ESQUEMA_IMPORTACAO[campo]["tipo"]]
+    valores, invalido = coagir(pd.Series([valor], dtype=object))
+    if invalido.iloc[0]:
+        raise ValueError(f"{campo}: {mensagem}")
+
+    convertido = valores.iloc[0]
+    return None if pd.isna(convertido) else convertido
+
+
+def validar_importacao(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Valida e converte a planilha inteira, coluna a coluna, de forma vetorizada.
+
+    Retorna (validos, erros): `validos` tem só as linhas sem nenhum erro, já com
+    os tipos do banco e None nas células vazias; `erros` tem uma linha por
+    problema encontrado (linha do Excel, coluna, valor, erro).
+    Levanta ValueError se faltarem colunas, antes de qualquer conversão.
+    """
+    validar_colunas_excel(df)
 
-    df["data_limite_da_entrega"] = pd.to_datetime(
-        df["data_limite_da_entrega"], errors="coerce"
-    ).dt.date
+    # Células só com espaços contam como vazias
+    df = df.replace(r"^\s*$", None, regex=True)
 
-    alertas = df[
-        (df["data_limite_da_entrega"].notna()) &
-        (df["data_limite_da_entrega"] <= limite) &
-        (df["status"] != "Concluído")
-    ]
+    convertido = {}
+    erros = []
 
-    LOGGER.info(f"{len(alertas)} alertas encontrados.")
-    return alertas
+    for coluna, regra in ESQUEMA_IMPORTACAO.items():
+        coagir, mensagem = _COERCOES[regra["tipo"]]
+        valores, invalido = coagir(df[coluna])
+        convertido[coluna] = valores
+
+        if invalido.any():
+            erros.append(_relatorio(df, coluna, invalido, mensagem))
+
+        if regra.get("obrigatorio"):
+            ausente = df[coluna].isna()
+            if ausente.any():
+                erros.append(_relatorio(df, coluna, ausente, "campo obrigatório"))
+
+    erros_df = (
+        pd.concat(erros, ignore_index=True)
+        .sort_values(["linha", "coluna"], ignore_index=True)
+        if erros
+        else pd.DataFrame(columns=["linha", "coluna", "valor", "erro"])
+    )
+
+    validos = pd.DataFrame(convertido, index=df.index).astype(object)
+    validos = validos.where(validos.notna(), None)
+    validos = validos[~df.index.isin(erros_df.index_origem)] if erros else validos
+
+    LOGGER.info(
+        "Planilha validada.",
+        extra={"linhas": len(df), "validas": len(validos), "erros": len(erros_df)}
+    )
+    return validos, erros_df.drop(columns="index_origem", errors="ignore")
+
+
+def _relatorio(df: pd.DataFrame, coluna: str, mascara: pd.Series, erro: str) -> pd.DataFrame:
+    linhas = df.index[mascara]
+    return pd.DataFrame({
+        "index_origem": linhas,
+        # +2: cabeçalho na linha 1 do Excel e índice começando em 0
+        "linha": linhas + 2,
+        "coluna": coluna,
+        "valor": df.loc[mascara, coluna].astype("string").fillna("").to_numpy(),
+        "erro": erro,
+    })
 
 
 def atualizar_registro(registro_id: int, campo: str, valor):
     """
     Atualiza dinamicamente um campo do registro.
-    ATENÇÃO: campo deve ser validado antes de chamar essa função.
+    campo precisa estar em CAMPOS_EDITAVEIS; valor é convertido por validar_valor.
     """
+    valor = validar_valor(campo, valor)
 
     sql = text(f"""
         UPDATE edumanager.controle_materia
-        SET {campo} = :valor
+        SET {campo} = :valor{clausula_ano_letivo({campo: "valor"})}
         WHERE id = :id
     """)
 
@@ -54,7 +195,8 @@ def atualizar_registro(registro_id: int, campo: str, valor):
         session.execute(sql, {"valor": valor, "id": registro_id})
         session.commit()
         LOGGER.info(
-            f"Registro {registro_id} atualizado: {campo} = {valor}"
+            "Registro atualizado.",
+            extra={"record_id": registro_id, "campo": campo}
         )
     except Exception:
         session.rollback()
@@ -62,3 +204,37 @@ def atualizar_registro(registro_id: int, campo: str, valor):
         raise
     finally:
         session.close()
+
+
+def atualizar_em_massa(filters: dict | None, campo: str, valor) -> int:
+    """
+    Aplica `campo = valor` a todos os registros que atendem aos filtros
+    (mesmo formato de fetch_all) num único UPDATE. Retorna as linhas alteradas.
+    """
+    if campo not in CAMPOS_EDICAO_EM_MASSA:
+        raise ValueError(f"Campo não permitido na edição em massa: {campo}")
+
+    valor = validar_valor(campo, valor)
+    where, params = montar_filtros(filters)
+
+    sql = text(f"""
+        UPDATE edumanager.controle_materia a
+        SET {campo} = :valor{clausula_ano_letivo({campo: "valor"})}
+        {where}
+    """)
+
+    session = get_session()
+    try:
+        linhas = session.execute(sql, {**params, "valor": valor}).rowcount
+        session.commit()
+        LOGGER.info(
+            "Edição em massa aplicada.",
+            extra={"campo": campo, "filtros": filters, "linhas": linhas}
+        )
+        return linhas
+    except Exception:
+        session.rollback()
+        LOGGER.exception("Erro na edição em massa.")
+        raise
+    finally:
+        session.close()
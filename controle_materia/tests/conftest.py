@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Os módulos do app são importados pelo nome (from database import ...)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# database.py exige DATABASE_URL na importação. Os testes nunca usam a URL do
+# ambiente: TEST_DATABASE_URL aponta para um PostgreSQL descartável (os testes
+# de integração apagam o schema edumanager); sem ela, um SQLite sem uso.
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or (
+    f"sqlite:///{Path(tempfile.gettempdir()) / 'edumanager_testes.db'}"
+)
+os.environ.pop("DATABASE_REPLICA_URL", None)
+
+# Tabelas de bloco são mantidas fora do app; o mínimo que as consultas usam
+_DDL_BLOCOS = """
+    CREATE TABLE edumanager.bloco (
+        bloco VARCHAR, data_limite_da_entrega DATE, grupo VARCHAR
+    );
+    CREATE TABLE edumanager.bloco_grupo_relation (
+        id BIGINT, bloco VARCHAR, grupo VARCHAR
+    );
+"""
+
+
+@pytest.fixture(scope="session")
+def postgres():
+    """Schema edumanager recriado do zero no banco de TEST_DATABASE_URL."""
+    from sqlalchemy import text
+    import database
+
+    if database.engine.dialect.name != "postgresql":
+        pytest.skip("defina TEST_DATABASE_URL com um PostgreSQL de teste")
+
+    with database.engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS edumanager CASCADE"))
+
+    database.garantir_schema()
+    with database.engine.begin() as conn:
+        conn.execute(text(_DDL_BLOCOS))
+
+    return database.engine
+
+
+@pytest.fixture
+def banco(postgres):
+    """Banco de teste com controle_materia e blocos vazios."""
+    from sqlalchemy import text
+
+    yield postgres
+    with postgres.begin() as conn:
+        conn.execute(text("""
+            TRUNCATE edumanager.controle_materia, edumanager.bloco,
+                     edumanager.bloco_grupo_relation, edumanager.alertas,
+                     edumanager.alertas_outbox
+        """))
@@ -0,0 +1,158 @@
+from datetime import date
+
+import pandas as pd
+
+import contextvars
+import threading
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import text
+
+from database import (
+    _gravar_parquet, _ler_parquet, montar_filtros, fetch_historico,
+    engine, SessaoLeitura, set_sessao_leitura,
+    carregar_pagina, set_envoltorio_tarefa, buscar_registros,
+)
+
+
+COLUNAS = ["id", "turma", "data_limite_da_entrega", "data_da_entrega", "ano_letivo"]
+
+
+def test_parquet_preserva_datas(tmp_path):
+    df = pd.DataFrame({
+        "id": [1, 2],
+        "turma": ["6A", "6B"],
+        "data_limite_da_entrega": [date(2024, 3, 1), None],
+        "data_da_entrega": [date(2024, 2, 28), date(2024, 3, 2)],
+        "ano_letivo": [2024, 2024],
+    })
+
+    caminho = _gravar_parquet(df, tmp_path / "controle_materia_2024.parquet")
+    lido = _ler_parquet(str(caminho), COLUNAS)
+
+    assert lido["data_limite_da_entrega"].tolist()[0] == date(2024, 3, 1)
+    assert pd.isna(lido["data_limite_da_entrega"].tolist()[1])
+    assert lido["data_da_entrega"].tolist() == [date(2024, 2, 28), date(2024, 3, 2)]
+
+
+def test_parquet_coluna_de_data_toda_vazia(tmp_path):
+    df = pd.DataFrame({
+        "id": [1, 2],
+        "turma": ["6A", "6B"],
+        "data_limite_da_entrega": [date(2023, 5, 1), date(2023, 6, 1)],
+        "data_da_entrega": [None, None],
+        "ano_letivo": [2023, 2023],
+    })
+
+    caminho = _gravar_parquet(df, tmp_path / "controle_materia_2023.parquet")
+    lido = _ler_parquet(str(caminho), COLUNAS)
+
+    assert lido["data_da_entrega"].isna().all()
+    assert lido["data_limite_da_entrega"].tolist() == [date(2023, 5, 1), date(2023, 6, 1)]
+
+
+def test_montar_filtros_prazo_usa_prazo_do_bloco():
+    where, params = montar_filtros({"turma": "6A", "prazo_dias": 7})
+
+    assert "a.turma_id = (SELECT id FROM edumanager.turmas WHERE nome = :turma)" in where
+    assert "edumanager.bloco bl" in where
+    assert "<= current_date + :prazo_dias" in where
+    assert params == {"turma": "6A", "prazo_dias": 7}
+
+
+def test_montar_filtros_por_id():
+    where, params = montar_filtros({"professor_id": 3})
+
+    assert where == " WHERE a.professor_id = :professor_id"
+    assert params == {"professor_id": 3}
+
+
+def test_fetch_historico_rejeita_filtro_por_id():
+    with pytest.raises(ValueError):
+        fetch_historico({"turma_id": 1})
+
+
+def test_montar_filtros_rejeita_coluna_desconhecida():
+    with pytest.raises(ValueError):
+        montar_filtros({"obs; DROP TABLE x": 1})
+
+
+def test_commit_abre_janela_so_da_propria_sessao():
+    sessao = SessaoLeitura()
+
+    def commit_em_segundo_plano():
+        with engine.begin() as conn:
+            conn.execute(text("SELECT 1"))
+
+    t = threading.Thread(target=commit_em_segundo_plano)
+    t.start()
+    t.join()
+    assert sessao.ultima_escrita == 0.0
+
+    set_sessao_leitura(sessao)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT 1"))
+    finally:
+        set_sessao_leitura(None)
+    assert sessao.ultima_escrita > 0.0
+
+
+_contexto_teste = contextvars.ContextVar("contexto_teste", default=None)
+
+
+def test_carregar_pagina_devolve_resultado_por_nome():
+    dados = carregar_pagina(a=lambda: 1, b=lambda: [2, 3])
+    assert dados == {"a": 1, "b": [2, 3]}
+
+
+def test_carregar_pagina_roda_em_paralelo():
+    barreira = threading.Barrier(2, timeout=5)
+
+    # Se as consultas rodassem em sequência a barreira estouraria o timeout
+    dados = carregar_pagina(a=barreira.wait, b=barreira.wait)
+    assert sorted(dados.values()) == [0, 1]
+
+
+def test_carregar_pagina_propaga_contexto():
+    _contexto_teste.set("rerun-1")
+    try:
+        dados = carregar_pagina(valor=_contexto_teste.get)
+    finally:
+        _contexto_teste.set(None)
+    assert dados == {"valor": "rerun-1"}
+
+
+def test_carregar_pagina_relanca_excecao():
+    def falha():
+        raise KeyError("consulta")
+
+    with pytest.raises(KeyError, match="consulta"):
+        carregar_pagina(ok=lambda: 1, falha=falha)
+
+
+def test_carregar_pagina_usa_envoltorio_da_thread_chamadora():
+    chamadas = []
+
+    @contextmanager
+    def envoltorio():
+        chamadas.append(threading.current_thread().name)
+        yield
+
+    set_envoltorio_tarefa(envoltorio)
+    try:
+        carregar_pagina(a=lambda: 1, b=lambda: 2)
+    finally:
+        set_envoltorio_tarefa(None)
+    carregar_pagina(c=lambda: 3)
+
+    assert len(chamadas) == 2
+    assert all(nome.startswith("carregar-pagina") for nome in chamadas)
+
+
+@pytest.mark.parametrize("termo", ["", "   "])
+def test_busca_sem_termo_nao_consulta_o_banco(termo):
+    resultados, total = buscar_registros(termo, pagina=3)
+    assert resultados.empty
+    assert total == 0
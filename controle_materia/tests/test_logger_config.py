@@ -0,0 +1,115 @@
+import json
+import logging
+import queue
+
+import pytest
+
+import logger_config
+from logger_config import (
+    ContextFilter, JsonFormatter, _QueueHandler, log_duration, set_log_context,
+)
+
+
+@pytest.fixture
+def registros():
+    """Logger com a mesma cadeia do setup_logger; devolve as linhas JSON."""
+    fila = queue.SimpleQueue()
+    handler = _QueueHandler(fila)
+    handler.addFilter(ContextFilter())
+
+    logger = logging.getLogger("teste_logger_config")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+
+    def linhas() -> list[dict]:
+        formatter = JsonFormatter()
+        saida = []
+        while not fila.empty():
+            linha = formatter.format(fila.get())
+            assert "\n" not in linha
+            saida.append(json.loads(linha))
+        return saida
+
+    yield logger, linhas
+    logger.removeHandler(handler)
+    logger_config._request_id.set(None)
+    logger_config._rerun_id.set(None)
+
+
+def test_uma_linha_json_por_registro_com_contexto(registros):
+    logger, linhas = registros
+    set_log_context(request_id="sessao1", rerun_id="rerun1")
+
+    logger.info("primeiro %s", "registro", extra={"record_id": 7})
+    logger.warning("segundo\ncom quebra")
+
+    primeiro, segundo = linhas()
+    assert primeiro["msg"] == "primeiro registro"
+    assert primeiro["request_id"] == "sessao1"
+    assert primeiro["rerun_id"] == "rerun1"
+    assert primeiro["record_id"] == 7
+    assert segundo["level"] == "WARNING"
+    assert segundo["msg"] == "segundo\ncom quebra"
+
+
+def test_excecao_vira_campo_exc(registros):
+    logger, linhas = registros
+
+    try:
+        raise ValueError("falhou")
+    except ValueError:
+        logger.exception("Erro ao salvar.")
+
+    (registro,) = linhas()
+    assert registro["msg"] == "Erro ao salvar."
+    assert "ValueError: falhou" in registro["exc"]
+
+
+def test_log_duration_registra_duracao(registros):
+    logger, linhas = registros
+
+    with log_duration(logger, "fetch_all", linhas_lidas=3):
+        pass
+
+    (registro,) = linhas()
+    assert registro["evento"] == "fetch_all"
+    assert registro["level"] == "INFO"
+    assert registro["linhas_lidas"] == 3
+    assert registro["duration_ms"] >= 0
+    assert "erro" not in registro
+
+
+def test_log_duration_marca_falha(registros):
+    logger, linhas = registros
+
+    with pytest.raises(KeyError):
+        with log_duration(logger, "fetch_all"):
+            raise KeyError("x")
+
+    (registro,) = linhas()
+    assert registro["level"] == "WARNING"
+    assert registro["erro"] == "KeyError"
+    assert "duration_ms" in registro
+
+
+def test_setup_logger_grava_arquivo(tmp_path, monkeypatch):
+    arquivo = tmp_path / "app.log"
+    monkeypatch.setattr(logger_config, "LOG_FILE", str(arquivo))
+    raiz = logging.getLogger()
+    handlers_antes = list(raiz.handlers)
+    nivel_antes = raiz.level
+    logger_config.shutdown_logger()
+
+    logger_config.setup_logger()
+    logger_config.setup_logger()  # idempotente: um handler só
+    try:
+        logging.getLogger("teste").info("gravado", extra={"evento": "x"})
+    finally:
+        logger_config.shutdown_logger()
+        for handler in raiz.handlers[len(handlers_antes):]:
+            raiz.removeHandler(handler)
+        raiz.setLevel(nivel_antes)
+
+    linhas = arquivo.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(l)["msg"] for l in linhas] == ["gravado"]
@@ -0,0 +1,185 @@
+"""Integração com PostgreSQL; só roda com TEST_DATABASE_URL definida."""
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from database import (
+    insert_record, fetch_all, contar_registros,
+    recalcular_alertas, listar_outbox_pendente, buscar_registros,
+)
+from services import atualizar_registro, atualizar_em_massa
+
+ANO = date.today().year
+
+
+def _inserir(banco, **campos) -> int:
+    registro = {
+        "turma": "6A", "materia": "Matemática", "professor_titular": "Ana",
+        "trimestre": "1", "bloco": "1", **campos,
+    }
+    insert_record(registro)
+    with banco.connect() as conn:
+        return conn.execute(text("SELECT max(id) FROM edumanager.controle_materia")).scalar()
+
+
+def _particao(banco, registro_id: int) -> tuple[int, str]:
+    with banco.connect() as conn:
+        linha = conn.execute(text("""
+            SELECT ano_letivo, tableoid::regclass::text AS particao
+            FROM edumanager.controle_materia WHERE id = :id
+        """), {"id": registro_id}).one()
+    return linha.ano_letivo, linha.particao
+
+
+def test_editar_data_move_registro_de_particao(banco):
+    registro_id = _inserir(banco, data_limite_da_entrega=date(ANO, 3, 1))
+    assert _particao(banco, registro_id) == (ANO, f"edumanager.controle_materia_{ANO}")
+
+    atualizar_registro(registro_id, "data_limite_da_entrega", f"{ANO + 1}-03-01")
+
+    assert _particao(banco, registro_id) == (ANO + 1, f"edumanager.controle_materia_{ANO + 1}")
+
+
+def test_editar_data_tira_registro_da_particao_default(banco):
+    registro_id = _inserir(banco, data_limite_da_entrega=date(2019, 3, 1))
+    assert _particao(banco, registro_id) == (2019, "edumanager.controle_materia_default")
+
+    atualizar_registro(registro_id, "data_limite_da_entrega", f"{ANO}-05-10")
+
+    assert _particao(banco, registro_id) == (ANO, f"edumanager.controle_materia_{ANO}")
+
+
+def test_editar_data_secundaria_respeita_prioridade(banco):
+    registro_id = _inserir(banco, data_limite_da_entrega=date(ANO, 3, 1))
+
+    # data_limite_da_entrega continua definindo o período
+    atualizar_registro(registro_id, "data_da_entrega", f"{ANO + 1}-01-10")
+    assert _particao(banco, registro_id)[0] == ANO
+
+    atualizar_registro(registro_id, "data_limite_da_entrega", None)
+    atualizar_registro(registro_id, "data_da_entrega", f"{ANO + 1}-01-11")
+    assert _particao(banco, registro_id)[0] == ANO + 1
+
+
+def test_edicao_em_massa_de_data_move_registros(banco):
+    ids = [_inserir(banco, data_limite_da_entrega=date(ANO, 3, 1)) for _ in range(3)]
+
+    linhas = atualizar_em_massa({"turma": "6A"}, "data_limite_da_entrega", f"{ANO + 1}-02-01")
+
+    assert linhas == 3
+    assert {_particao(banco, i)[0] for i in ids} == {ANO + 1}
+
+
+def test_fetch_all_filtra_pelas_chaves_das_dimensoes(banco):
+    _inserir(banco, turma="6A", professor_titular="Ana")
+    _inserir(banco, turma="7B", professor_titular="Bruno")
+
+    with banco.connect() as conn:
+        sem_id = conn.execute(text("""
+            SELECT count(*) FROM edumanager.controle_materia
+            WHERE turma_id IS NULL OR materia_id IS NULL OR professor_id IS NULL
+        """)).scalar()
+    assert sem_id == 0
+
+    df = fetch_all({"turma": "7B"}, primary=True)
+    assert df["professor_titular"].tolist() == ["Bruno"]
+    assert fetch_all({"turma": "inexistente"}, primary=True).empty
+
+
+def _valores(banco, coluna: str) -> list:
+    with banco.connect() as conn:
+        return conn.execute(text(
+            f"SELECT {coluna} FROM edumanager.controle_materia ORDER BY id"
+        )).scalars().all()
+
+
+def test_edicao_em_massa_converte_o_valor(banco):
+    _inserir(banco, data_limite_da_entrega=date(ANO, 3, 1))
+
+    atualizar_em_massa({"turma": "6A"}, "data_da_entrega", f"10/02/{ANO}")
+
+    assert _valores(banco, "data_da_entrega") == [date(ANO, 2, 10)]
+
+
+def test_edicao_em_massa_so_altera_os_filtrados(banco):
+    _inserir(banco, turma="6A", data_limite_da_entrega=date(ANO, 3, 1))
+    _inserir(banco, turma="7B", data_limite_da_entrega=date(ANO, 3, 1))
+
+    linhas = atualizar_em_massa({"turma": "7B"}, "obs", "  revisar  ")
+
+    assert linhas == 1
+    assert _valores(banco, "obs") == [None, "revisar"]
+
+
+def test_edicao_em_massa_sem_filtros_altera_todos(banco):
+    for turma in ("6A", "7B", "8C"):
+        _inserir(banco, turma=turma, data_limite_da_entrega=date(ANO, 3, 1))
+
+    assert atualizar_em_massa({}, "diagramacao", "ok") == 3
+    assert _valores(banco, "diagramacao") == ["ok", "ok", "ok"]
+
+
+def test_prazo_usa_o_prazo_do_bloco(banco):
+    hoje = date.today()
+    no_bloco = _inserir(banco, bloco="2", data_limite_da_entrega=hoje + timedelta(days=60))
+    _inserir(banco, bloco="2", data_limite_da_entrega=hoje + timedelta(days=60))
+    with banco.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO edumanager.bloco VALUES ('2', :prazo, 'Grupo 2.1');
+            INSERT INTO edumanager.bloco_grupo_relation VALUES (:id, '2', 'Grupo 2.1');
+        """), {"prazo": hoje + timedelta(days=3), "id": no_bloco})
+
+    assert contar_registros({"prazo_dias": 7}, primary=True) == 1
+    linhas = atualizar_em_massa({"prazo_dias": 7}, "obs", "urgente")
+    assert linhas == 1
+    assert _valores(banco, "obs") == ["urgente", None]
+
+
+def test_outbox_distingue_prazo_de_outros_dados(banco):
+    hoje = date.today()
+    registro_id = _inserir(banco, data_limite_da_entrega=hoje + timedelta(days=2))
+
+    recalcular_alertas()
+    atualizar_registro(registro_id, "capitulo", "Cap. 9")
+    recalcular_alertas()
+    atualizar_registro(registro_id, "data_limite_da_entrega", (hoje + timedelta(days=4)).isoformat())
+    recalcular_alertas()
+    recalcular_alertas()  # sem mudanças: nada novo no outbox
+
+    assert listar_outbox_pendente()["tipo"].tolist() == [
+        "novo", "dados_alterados", "prazo_alterado"
+    ]
+
+
+def test_busca_pagina_e_total(banco):
+    for capitulo in ("Fotossíntese", "Fotossíntese II", "Fotossíntese III"):
+        _inserir(banco, materia="Ciências", capitulo=capitulo)
+    _inserir(banco, materia="História", capitulo="Revolução Francesa")
+
+    pagina1, total1 = buscar_registros("fotossíntese", pagina=1, por_pagina=2, primary=True)
+    pagina2, total2 = buscar_registros("fotossíntese", pagina=2, por_pagina=2, primary=True)
+
+    assert (len(pagina1), total1) == (2, 3)
+    assert (len(pagina2), total2) == (1, 3)
+    assert set(pagina1["id"]).isdisjoint(pagina2["id"])
+    assert "total" not in pagina1.columns
+
+
+def test_busca_pagina_alem_da_ultima_mantem_total(banco):
+    for capitulo in ("Fotossíntese", "Fotossíntese II", "Fotossíntese III"):
+        _inserir(banco, materia="Ciências", capitulo=capitulo)
+
+    resultados, total = buscar_registros("fotossíntese", pagina=5, por_pagina=2, primary=True)
+
+    assert resultados.empty
+    assert total == 3
+
+
+def test_busca_por_trecho_de_palavra_e_sem_resultado(banco):
+    _inserir(banco, materia="Ciências", capitulo="Fotossíntese", obs="rever gráficos")
+
+    trecho, total = buscar_registros("gráfic", primary=True)
+    assert total == 1
+    assert trecho.iloc[0]["obs"] == "rever gráficos"
+
+    assert buscar_registros("astronomia", primary=True)[1] == 0
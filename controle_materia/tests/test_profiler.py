@@ -0,0 +1,47 @@
+import contextvars
+import pstats
+import threading
+
+from profiler import perfil_rerun, perfil_tarefa
+
+
+def _consulta():
+    return sum(range(1000))
+
+
+def _consulta_em_outra_thread():
+    def tarefa():
+        with perfil_tarefa():
+            _consulta()
+
+    t = threading.Thread(target=contextvars.copy_context().run, args=(tarefa,))
+    t.start()
+    t.join()
+
+
+def test_perfil_inclui_tarefas_de_outras_threads(tmp_path):
+    with perfil_rerun("r1", "deterministico", tmp_path):
+        _consulta_em_outra_thread()
+
+    stats = pstats.Stats(str(tmp_path / "r1.prof"))
+    funcoes = {nome for (_, _, nome) in stats.stats}
+    assert "_consulta" in funcoes
+
+
+def test_perfil_inclui_consultas_do_carregar_pagina(tmp_path):
+    from database import carregar_pagina, set_envoltorio_tarefa
+
+    set_envoltorio_tarefa(perfil_tarefa)
+    try:
+        with perfil_rerun("r2", "deterministico", tmp_path):
+            carregar_pagina(a=_consulta)
+    finally:
+        set_envoltorio_tarefa(None)
+
+    stats = pstats.Stats(str(tmp_path / "r2.prof"))
+    assert "_consulta" in {nome for (_, _, nome) in stats.stats}
+
+
+def test_perfil_tarefa_sem_rerun_perfilado():
+    with perfil_tarefa():
+        pass
@@ -0,0 +1,41 @@
+import pytest
+
+from run_app import Supervisor, dividir_orcamento_pool, log_file_worker
+
+
+def test_log_file_worker_por_porta(monkeypatch):
+    monkeypatch.setenv("LOG_FILE", "logs/app.log")
+    assert log_file_worker(8502) == "logs/app-8502.log"
+
+
+def test_dividir_orcamento_pool_respeita_orcamento():
+    pool_size, max_overflow = dividir_orcamento_pool(4, 15)
+    assert 4 * (pool_size + max_overflow) <= 15
+
+
+def test_dividir_orcamento_pool_insuficiente():
+    with pytest.raises(ValueError):
+        dividir_orcamento_pool(4, 3)
+
+
+def _supervisor_com(saudaveis: list[int]) -> Supervisor:
+    supervisor = Supervisor(3, 9000)
+    supervisor._saudaveis = saudaveis
+    return supervisor
+
+
+def test_porta_para_nao_remapeia_quando_outro_worker_cai():
+    todos = _supervisor_com([9000, 9001, 9002])
+    clientes = [f"10.0.0.{i}" for i in range(50)]
+    antes = {c: todos.porta_para(c) for c in clientes}
+
+    sem_9002 = _supervisor_com([9000, 9001])
+    for cliente, porta in antes.items():
+        if porta != 9002:
+            assert sem_9002.porta_para(cliente) == porta
+        else:
+            assert sem_9002.porta_para(cliente) in (9000, 9001)
+
+
+def test_porta_para_sem_workers_saudaveis():
+    assert _supervisor_com([]).porta_para("10.0.0.1") is None
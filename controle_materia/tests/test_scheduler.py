@@ -0,0 +1,130 @@
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pytest
+
+import scheduler
+from scheduler import AgendadorAlertas, _MARGEM
+
+
+class _Recalculo:
+    """Substitui recalcular_alertas e guarda os `desde` recebidos."""
+
+    def __init__(self):
+        self.chamadas = []
+        self.ocupado = False
+        self.agora = datetime(2026, 3, 10, 12, 0)
+
+    def __call__(self, desde):
+        self.chamadas.append(desde)
+        if self.ocupado:
+            return None
+        return {"calculado_em": self.agora}
+
+
+@pytest.fixture
+def recalculo(monkeypatch):
+    falso = _Recalculo()
+    monkeypatch.setattr(scheduler, "recalcular_alertas", falso)
+    return falso
+
+
+def test_primeira_execucao_e_completa(recalculo):
+    agendador = AgendadorAlertas()
+    agendador.executar_uma_vez()
+
+    assert recalculo.chamadas == [None]
+    assert agendador._desde == recalculo.agora - _MARGEM
+    assert agendador._ultimo_completo == date.today()
+
+
+def test_execucoes_seguintes_sao_incrementais_com_margem(recalculo):
+    agendador = AgendadorAlertas()
+    agendador.executar_uma_vez()
+
+    recalculo.agora += timedelta(minutes=5)
+    agendador.executar_uma_vez()
+    agendador.executar_uma_vez()
+
+    assert recalculo.chamadas == [
+        None,
+        datetime(2026, 3, 10, 12, 0) - _MARGEM,
+        datetime(2026, 3, 10, 12, 5) - _MARGEM,
+    ]
+
+
+def test_recalculo_completo_pedido(recalculo):
+    agendador = AgendadorAlertas()
+    agendador.executar_uma_vez()
+
+    agendador.notificar(completo=True)
+    agendador.executar_uma_vez()
+    agendador.executar_uma_vez()
+
+    assert recalculo.chamadas[1] is None
+    assert recalculo.chamadas[2] is not None
+
+
+def test_recalculo_completo_uma_vez_por_dia(recalculo):
+    agendador = AgendadorAlertas()
+    agendador.executar_uma_vez()
+
+    agendador._ultimo_completo = date.today() - timedelta(days=1)
+    agendador.executar_uma_vez()
+
+    assert recalculo.chamadas == [None, None]
+    assert agendador._ultimo_completo == date.today()
+
+
+def test_lock_ocupado_repete_o_recalculo_completo(recalculo):
+    agendador = AgendadorAlertas()
+    recalculo.ocupado = True
+    agendador.executar_uma_vez()
+
+    assert agendador._desde is None
+
+    recalculo.ocupado = False
+    agendador.executar_uma_vez()
+
+    assert recalculo.chamadas == [None, None]
+    assert agendador._desde == recalculo.agora - _MARGEM
+
+
+def test_lock_ocupado_mantem_o_watermark(recalculo):
+    agendador = AgendadorAlertas()
+    agendador.executar_uma_vez()
+    desde = agendador._desde
+
+    recalculo.ocupado = True
+    agendador.executar_uma_vez()
+    recalculo.ocupado = False
+    agendador.executar_uma_vez()
+
+    assert recalculo.chamadas[1:] == [desde, desde]
+
+
+def test_outbox_so_marca_o_que_foi_enviado(recalculo, monkeypatch):
+    pendentes = pd.DataFrame({"id": [1, 2], "tipo": ["novo", "prazo_alterado"]})
+    marcados = []
+    monkeypatch.setattr(scheduler, "listar_outbox_pendente", lambda: pendentes)
+    monkeypatch.setattr(scheduler, "marcar_outbox_enviado", marcados.append)
+
+    enviados = []
+    AgendadorAlertas(enviar=enviados.append).executar_uma_vez()
+    assert enviados[0] is pendentes
+    assert marcados == [[1, 2]]
+
+    def falha(_):
+        raise RuntimeError("smtp fora")
+
+    with pytest.raises(RuntimeError):
+        AgendadorAlertas(enviar=falha).executar_uma_vez()
+    assert marcados == [[1, 2]]
+
+
+def test_sem_envio_nao_le_o_outbox(recalculo, monkeypatch):
+    def nao_chamar():
+        raise AssertionError("outbox lido sem enviar configurado")
+
+    monkeypatch.setattr(scheduler, "listar_outbox_pendente", nao_chamar)
+    AgendadorAlertas().executar_uma_vez()
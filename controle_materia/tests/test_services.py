@@ -0,0 +1,138 @@
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from services import (
+    ESQUEMA_IMPORTACAO, atualizar_em_massa, validar_importacao, validar_valor,
+)
+
+
+def _planilha(**colunas) -> pd.DataFrame:
+    """Planilha com duas linhas válidas; `colunas` sobrescreve valores."""
+    base = {
+        "turma": ["6A", "6B"],
+        "materia": ["Matemática", "História"],
+        "professor_titular": ["Ana", "Bruno"],
+        "trimestre": ["1", "1"],
+        "capitulo": ["1", "2"],
+        "bloco": [1, 2],
+        "status": ["Não iniciado", "Em andamento"],
+        "data_limite_da_entrega": ["2024-03-01", "15/03/2024"],
+        "data_da_entrega": [None, None],
+        "validacao_operacional": [None, None],
+        "revisao_pedagogica": [None, None],
+        "diagramacao": [None, None],
+        "data_de_aprovacao_final": [None, None],
+        "obs": [None, None],
+    }
+    base.update(colunas)
+    return pd.DataFrame(base)
+
+
+def _erros(erros: pd.DataFrame) -> set[tuple[int, str]]:
+    return set(zip(erros["linha"], erros["coluna"]))
+
+
+def test_planilha_valida():
+    validos, erros = validar_importacao(_planilha())
+
+    assert erros.empty
+    assert len(validos) == 2
+    registro = validos.iloc[0].to_dict()
+    assert registro["bloco"] == "1"
+    assert registro["data_limite_da_entrega"] == date(2024, 3, 1)
+    assert registro["data_da_entrega"] is None
+    assert validos.iloc[1]["data_limite_da_entrega"] == date(2024, 3, 15)
+
+
+def test_numeros_em_colunas_de_texto_nao_ganham_casa_decimal():
+    # Coluna numérica com célula vazia vira float64 no read_excel
+    validos, erros = validar_importacao(
+        _planilha(trimestre=[1.0, 2.0], capitulo=[3.0, float("nan")], obs=[2.5, None])
+    )
+
+    assert erros.empty
+    assert validos["trimestre"].tolist() == ["1", "2"]
+    assert validos.iloc[0]["capitulo"] == "3"
+    assert validos.iloc[1]["capitulo"] is None
+    assert validos.iloc[0]["obs"] == "2.5"
+
+
+def test_colunas_ausentes_falham_antes_da_conversao():
+    with pytest.raises(ValueError, match="Colunas ausentes"):
+        validar_importacao(_planilha().drop(columns=["obs"]))
+
+
+@pytest.mark.parametrize("valor", ["2024-13-01", "03/15/2024", "31/02/2024", "ontem"])
+def test_datas_invalidas(valor):
+    validos, erros = validar_importacao(
+        _planilha(data_limite_da_entrega=[valor, "2024-03-01"])
+    )
+
+    assert _erros(erros) == {(2, "data_limite_da_entrega")}
+    assert validos.index.tolist() == [1]
+
+
+def test_datas_do_excel_ja_convertidas():
+    validos, erros = validar_importacao(
+        _planilha(data_da_entrega=[datetime(2024, 2, 1), pd.NaT])
+    )
+
+    assert erros.empty
+    assert validos.iloc[0]["data_da_entrega"] == date(2024, 2, 1)
+
+
+@pytest.mark.parametrize("valor", ["x", 0, 2.5, -1])
+def test_bloco_invalido(valor):
+    _, erros = validar_importacao(_planilha(bloco=[valor, 2]))
+
+    assert _erros(erros) == {(2, "bloco")}
+
+
+def test_bloco_texto_numerico():
+    validos, erros = validar_importacao(_planilha(bloco=[" 03 ", 4.0]))
+
+    assert erros.empty
+    assert validos["bloco"].tolist() == ["3", "4"]
+
+
+def test_status_fora_da_lista():
+    _, erros = validar_importacao(_planilha(status=["Pronto", None]))
+
+    assert _erros(erros) == {(2, "status")}
+
+
+@pytest.mark.parametrize(
+    "coluna",
+    [c for c, regra in ESQUEMA_IMPORTACAO.items() if regra.get("obrigatorio")]
+)
+def test_campos_obrigatorios(coluna):
+    valores = _planilha()[coluna].tolist()
+    valores[1] = "   "
+    validos, erros = validar_importacao(_planilha(**{coluna: valores}))
+
+    assert _erros(erros) == {(3, coluna)}
+    assert validos.index.tolist() == [0]
+
+
+def test_validar_valor():
+    assert validar_valor("data_da_entrega", date(2024, 3, 4)) == date(2024, 3, 4)
+    assert validar_valor("obs", "  texto ") == "texto"
+    assert validar_valor("obs", None) is None
+
+    with pytest.raises(ValueError):
+        validar_valor("status", "Pronto")
+    with pytest.raises(ValueError):
+        validar_valor("id", 1)
+
+
+@pytest.mark.parametrize("campo", ["status", "turma", "ano_letivo", "id"])
+def test_edicao_em_massa_recusa_campo_fora_da_lista(campo):
+    with pytest.raises(ValueError, match="não permitido"):
+        atualizar_em_massa({"turma": "6A"}, campo, "x")
+
+
+def test_edicao_em_massa_recusa_valor_invalido_antes_do_banco():
+    with pytest.raises(ValueError):
+        atualizar_em_massa({"turma": "6A"}, "data_da_entrega", "2024/13/45")